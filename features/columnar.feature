@@ -0,0 +1,26 @@
+Feature: pipecat.store.columnar
+
+    Scenario: pipecat.store.columnar.write and read
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And an instance of pipecat.store.columnar.write to charger.columnar with row_group_size=500.
+        When iterating through the pipe contents.
+        Then reading charger.columnar with pipecat.store.columnar.read will return 1390 records.
+        And the records read will match the records written.
+        And reading charger.columnar with pipecat.store.columnar.read and start=1000, stop=1010 will return 10 records.
+        And the records read will match records 1000 through 1010 of the records written.
+        And reading charger.columnar with pipecat.store.columnar.read between the 200th and 800th timestamps will return the records written between them.
+
+    Scenario: pipecat.store.columnar.load
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.columnar.write to charger.columnar with row_group_size=500.
+        When iterating through the pipe contents.
+        Then loading charger.columnar with pipecat.store.columnar.load and keys=[("battery", "voltage"), ("battery", "current")] will return a table with 1390 rows.
+        And the loaded table will contain columns [("battery", "voltage"), ("battery", "current")].
+        And the loaded table column ("battery", "voltage") will match the ("battery", "voltage") column of the records written.
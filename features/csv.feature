@@ -0,0 +1,46 @@
+Feature: pipecat.store.csv
+
+    Scenario: pipecat.store.csv.write and read
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And an instance of pipecat.store.csv.write to charger.csv with flush_count=100.
+        When iterating through the pipe contents.
+        Then reading charger.csv with pipecat.store.csv.read will return 1390 records.
+        And the records read will match the records written.
+
+    Scenario: pipecat.store.csv.load
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.csv.write to charger.csv with keys=[("charger", "mode"), ("battery", "voltage"), ("battery", "current")].
+        When iterating through the pipe contents.
+        Then loading charger.csv with pipecat.store.csv.load and keys=[("battery", "voltage"), ("charger", "mode")] will return a table with 1390 rows.
+        And the loaded table will contain columns [("charger", "mode"), ("battery", "voltage")].
+        And the loaded table column ("battery", "voltage") will match the ("battery", "voltage") column of the records written.
+        And the loaded table column ("charger", "mode") will match the ("charger", "mode") column of the records written.
+
+    Scenario: pipecat.store.csv.write with compression
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And an instance of pipecat.store.csv.write to charger.csv.xz with flush_count=100.
+        When iterating through the pipe contents.
+        Then reading charger.csv.xz with pipecat.store.csv.read will return 1390 records.
+        And the records read will match the records written.
+
+    Scenario: pipecat.store.csv.load with an empty column
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.csv.write to charger.csv with keys=[("battery", "voltage"), ("battery", "missing")].
+        When iterating through the pipe contents.
+        Then loading charger.csv with pipecat.store.csv.load and max_categories=256 will return a table with 1390 rows.
+        And the loaded table will contain columns [("battery", "voltage")].
+        And reading charger.csv with pipecat.store.csv.read will return 1390 records.
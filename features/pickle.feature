@@ -0,0 +1,112 @@
+Feature: pipecat.store.pickle
+
+    Scenario: pipecat.store.pickle.write with buffering
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=100.
+        When iterating through the pipe contents.
+        Then reading charger.pickle with pipecat.store.pickle.read will return 1390 records.
+        And the records read will match the records written.
+
+    Scenario: pipecat.store.pickle.write flushes when closed
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=None.
+        And an instance of pipecat.limit.count set to 5
+        When iterating through the pipe contents.
+        Then reading charger.pickle with pipecat.store.pickle.read will return 5 records.
+
+    Scenario: pipecat.store.pickle.read with an index
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=100, index=True.
+        When iterating through the pipe contents.
+        Then the file charger.pickle.index will exist.
+        And reading charger.pickle with pipecat.store.pickle.read and start=1000, stop=1010 will return 10 records.
+        And the records read will match records 1000 through 1010 of the records written.
+        And reading charger.pickle with pipecat.store.pickle.read and start=1385 will return 5 records.
+        And reading charger.pickle with pipecat.store.pickle.read between the 200th and 300th timestamps will return the records written between them.
+        And reading charger.pickle with pipecat.store.pickle.read and start=1000, stop=1010, index=False will return 10 records.
+        And the records read will match records 1000 through 1010 of the records written.
+
+    Scenario: pipecat.store.pickle.write maintains an existing index
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=100, index=True.
+        When iterating through the pipe contents.
+        And appending the records written to charger.pickle with pipecat.store.pickle.write and flush_count=100.
+        Then the index charger.pickle.index will contain 2780 entries.
+        And reading charger.pickle with pipecat.store.pickle.read and start=2000, stop=2010 will return 10 records.
+        And the records read will match records 2000 through 2010 of the records written.
+
+    Scenario: pipecat.store.pickle.read with an out-of-date index
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=100, index=True.
+        When iterating through the pipe contents.
+        And appending the records written to charger.pickle with pipecat.store.pickle.write and index=False.
+        Then the index charger.pickle.index will contain 1390 entries.
+        And reading charger.pickle with pipecat.store.pickle.read and start=2000, stop=2010 will return 10 records.
+        And the records read will match records 2000 through 2010 of the records written.
+        And reading charger.pickle with pipecat.store.pickle.read between the 200th and 300th timestamps will return the records written between them.
+
+    Scenario: pipecat.store.pickle.read in bulk
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=None, index=True.
+        When iterating through the pipe contents.
+        Then reading charger.pickle with pipecat.store.pickle.read and batch=500 will return 3 batches.
+        And the records read will match the records written.
+        And reading charger.pickle with pipecat.store.pickle.read and batch=500, processes=2 will return 3 batches.
+        And the records read will match the records written.
+
+    Scenario: pipecat.store.pickle.write with compact records
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=None, index=True, compact=True.
+        When iterating through the pipe contents.
+        Then reading charger.pickle with pipecat.store.pickle.read will return 1390 records.
+        And the records read will match the records written.
+        And reading charger.pickle with pipecat.store.pickle.read and start=1000, stop=1010 will return 10 records.
+        And the records read will match records 1000 through 1010 of the records written.
+        And reading charger.pickle with pipecat.store.pickle.read and batch=500, processes=2 will return 3 batches.
+        And the records read will match the records written.
+
+    Scenario: pipecat.store.pickle.write with compression
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle.gz with flush_count=100, index=True.
+        When iterating through the pipe contents.
+        Then reading charger.pickle.gz with pipecat.store.pickle.read will return 1390 records.
+        And the records read will match the records written.
+        And reading charger.pickle.gz with pipecat.store.pickle.read and start=1000, stop=1010 will return 10 records.
+        And the records read will match records 1000 through 1010 of the records written.
+
+    Scenario: pipecat.store.pickle.follow
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=100, compact=True.
+        When iterating through the pipe contents.
+        Then following charger.pickle with pipecat.store.pickle.follow and timeout=pipecat.quantity(0.1, pipecat.units.seconds) will return 1390 records.
+        And the records read will match the records written.
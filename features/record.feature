@@ -9,3 +9,24 @@ Feature: pipecat.record
         When iterating through the pipe contents.
         Then records can be dumped to the stream.
         And the stream contents will match pipecat-record-dump.txt
+
+    Scenario: pipecat.record.LazyRecord
+        Given a file named gps.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.gps.nmea
+        When iterating through the pipe contents.
+        Then every record will be a pipecat.record.LazyRecord that behaves like a dict containing quantities.
+
+    Scenario: pipecat.record.schema
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        When iterating through the pipe contents.
+        Then every record will be a pipecat.record.SchemaRecord that behaves like a dict containing quantities.
+
+    Scenario: pipecat.record.schema fields assigned in other units
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        When iterating through the pipe contents.
+        Then assigning ("battery", "voltage") in millivolt and then in volt will keep records aligned in a table.
@@ -0,0 +1,25 @@
+Feature: pipecat.store.sqlite
+
+    Scenario: pipecat.store.sqlite.write and read
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And an instance of pipecat.store.sqlite.write to charger.db with batch_size=100.
+        When iterating through the pipe contents.
+        Then reading charger.db with pipecat.store.sqlite.read will return 1390 records.
+        And the records read will match the records written.
+        And reading charger.db with pipecat.store.sqlite.read between the 200th and 800th timestamps will return the records written between them.
+        And reading charger.db with pipecat.store.sqlite.read and where={("charger", "mode"): "finished"} will return 103 records.
+        And reading charger.db with pipecat.store.sqlite.read and keys=[("battery", "voltage")] will return 1390 records.
+
+    Scenario: pipecat.store.sqlite.write with heterogeneous records
+        Given a file named gps.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.gps.nmea
+        And a temporary directory.
+        And an instance of pipecat.store.sqlite.write to gps.db with table="gps".
+        When iterating through the pipe contents.
+        Then reading gps.db with pipecat.store.sqlite.read and table="gps" will return 381 records.
+        And the records read will match the records written.
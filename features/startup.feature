@@ -0,0 +1,10 @@
+Feature: Startup
+
+    Scenario: Importing modules used by command line tools
+        Given the modules pipecat, pipecat.device.charger, pipecat.device.serial, pipecat.limit, pipecat.record, and pipecat.utility.
+        Then importing the modules will not import pint, numpy, arrow, requests, or serial.
+
+    Scenario: Caching unit definitions
+        Given a temporary directory.
+        Then creating a quantity with the cache in the temporary directory will cache the unit definitions.
+        And creating a quantity with the cache in the temporary directory will use the cached unit definitions.
@@ -0,0 +1,26 @@
+# Copyright 2016 Timothy M. Shead
+#
+# This file is part of Pipecat.
+#
+# Pipecat is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pipecat is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pipecat.  If not, see <http://www.gnu.org/licenses/>.
+
+from behave import *
+import nose.tools
+
+import pipecat.device.gps
+
+
+@given(u'an instance of pipecat.device.gps.nmea')
+def step_impl(context):
+    context.pipe = pipecat.device.gps.nmea(context.pipe, key="line")
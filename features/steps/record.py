@@ -17,14 +17,58 @@
 # Copyright 2016 Timothy M. Shead
 
 import io
+import pickle
 
 from behave import *
 import nose.tools
+import numpy
 
+import pipecat
 import pipecat.record
+import pipecat.store
 
 
 @then(u'records can be dumped to the stream.')
 def step_impl(context):
     for record in context.records:
         pipecat.record.dump(record, context.stream)
+
+
+@then(u'every record will be a pipecat.record.{type} that behaves like a dict containing quantities.')
+def step_impl(context, type):
+    for record in context.records:
+        nose.tools.assert_is_instance(record, getattr(pipecat.record, type))
+        contents = dict(record.items())
+        nose.tools.assert_equal(record, contents)
+        nose.tools.assert_equal(contents, record)
+        nose.tools.assert_equal(pickle.loads(pickle.dumps(record)), contents)
+        for key, magnitude, units in record.magnitudes():
+            if units is None:
+                nose.tools.assert_false(isinstance(record[key], pipecat.quantity))
+                nose.tools.assert_equal(record[key], magnitude)
+            else:
+                nose.tools.assert_is_instance(record[key], pipecat.quantity)
+                nose.tools.assert_equal(record[key], pipecat.quantity(magnitude, units))
+
+        keys = list(contents)
+        record = record.copy()
+        record[keys[0]] = "replaced"
+        del record[keys[-1]]
+        nose.tools.assert_equal(record[keys[0]], "replaced")
+        nose.tools.assert_not_in(keys[-1], record)
+        nose.tools.assert_equal(len(record), len(contents) - 1)
+
+
+@then(u'assigning {key} in {other} and then in {units} will keep records aligned in a table.')
+def step_impl(context, key, other, units):
+    key = eval(key)
+    table = pipecat.store.Table()
+    for record in context.records:
+        record = record.copy()
+        record[key] = record[key].to(other)
+        record[key] = record[key].to(units)
+        nose.tools.assert_equal(len(list(record)), len(set(record)))
+        nose.tools.assert_equal(len(record), len(context.records[0]))
+        table.append(record)
+    nose.tools.assert_equal(set(len(values) for values in table.values()), set([len(context.records)]))
+    numpy.testing.assert_almost_equal(table[key].magnitude, [record[key].to(units).magnitude for record in context.records])
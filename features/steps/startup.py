@@ -0,0 +1,71 @@
+# Copyright 2016 Timothy M. Shead
+#
+# This file is part of Pipecat.
+#
+# Pipecat is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pipecat is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pipecat.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import subprocess
+import sys
+
+from behave import *
+import nose.tools
+
+root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def _import(modules, script, **variables):
+    """Import modules in a new interpreter, and return the output of a script run afterwards."""
+    code = "import %s\n%s" % (", ".join(modules), script)
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = root_dir + os.pathsep + environment.get("PYTHONPATH", "")
+    environment.update(variables)
+    return subprocess.check_output([sys.executable, "-c", code], env=environment).decode("utf-8")
+
+
+def _names(names):
+    return [name.strip() for name in re.split(r",\s*(?:and |or )?|\s+(?:and|or)\s+", names) if name.strip()]
+
+
+@given(u'the modules {modules}.')
+def step_impl(context, modules):
+    context.modules = _names(modules)
+
+
+@then(u'importing the modules will not import {modules}.')
+def step_impl(context, modules):
+    imported = _import(context.modules, "import sys\nprint(' '.join(sorted(sys.modules)))").split()
+    for module in _names(modules):
+        nose.tools.assert_not_in(module, imported)
+
+
+def _cache_contents(context):
+    return sorted(filename for directory, subdirectories, filenames in os.walk(context.directory) for filename in filenames)
+
+
+@then(u'creating a quantity with the cache in the temporary directory will cache the unit definitions.')
+def step_impl(context):
+    output = _import(["pipecat"], "print(pipecat.quantity(3.7, pipecat.units.volts).to(pipecat.units.millivolts).magnitude)", PIPECAT_CACHE=context.directory)
+    nose.tools.assert_almost_equal(float(output), 3700)
+    context.cache_contents = _cache_contents(context)
+    nose.tools.assert_true(context.cache_contents)
+
+
+@then(u'creating a quantity with the cache in the temporary directory will use the cached unit definitions.')
+def step_impl(context):
+    script = "print(pipecat.quantity(10, pipecat.units.knots).to(pipecat.units.meters / pipecat.units.seconds).magnitude)"
+    output = _import(["pipecat"], script, PIPECAT_CACHE=context.directory)
+    nose.tools.assert_almost_equal(float(output), 5.144444, places=5)
+    nose.tools.assert_equal(_cache_contents(context), context.cache_contents)
@@ -0,0 +1,395 @@
+# Copyright 2016 Timothy M. Shead
+#
+# This file is part of Pipecat.
+#
+# Pipecat is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pipecat is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pipecat.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+
+from behave import *
+import arrow
+import nose.tools
+import numpy
+
+import pipecat.store
+import pipecat.store.columnar
+import pipecat.store.convert
+import pipecat.store.csv
+import pipecat.store.pickle
+import pipecat.store.sqlite
+
+
+@given(u'a temporary directory.')
+def step_impl(context):
+    context.directory = tempfile.mkdtemp()
+    context.add_cleanup(shutil.rmtree, context.directory)
+
+
+@given(u'an instance of pipecat.store.{module}.write to {filename} with {options}.')
+def step_impl(context, module, filename, options):
+    write = getattr(pipecat.store, module).write
+    context.pipe = eval("write(context.pipe, os.path.join(context.directory, filename), %s)" % options)
+
+
+@then(u'reading {filename} with pipecat.store.{module}.read will return {count:d} records.')
+def step_impl(context, filename, module, count):
+    read = getattr(pipecat.store, module).read
+    context.read_records = list(read(os.path.join(context.directory, filename)))
+    nose.tools.assert_equal(len(context.read_records), count)
+
+
+@then(u'reading {filename} with pipecat.store.{module}.read and {options} will return {count:d} records.')
+def step_impl(context, filename, module, options, count):
+    read = getattr(pipecat.store, module).read
+    context.read_records = list(eval("read(os.path.join(context.directory, filename), %s)" % options))
+    nose.tools.assert_equal(len(context.read_records), count)
+
+
+@then(u'reading {filename} with pipecat.store.{module}.read between the {start:d}th and {stop:d}th timestamps will return the records written between them.')
+def step_impl(context, filename, module, start, stop):
+    read = getattr(pipecat.store, module).read
+    since = context.records[start]["timestamp"]
+    until = context.records[stop]["timestamp"]
+    records = list(read(os.path.join(context.directory, filename), since=since, until=until))
+    nose.tools.assert_equal(records, [record for record in context.records if since <= record["timestamp"] < until])
+
+
+@then(u'reading {filename} with pipecat.store.{module}.read and {options} will return {count:d} batches.')
+def step_impl(context, filename, module, options, count):
+    read = getattr(pipecat.store, module).read
+    batches = list(eval("read(os.path.join(context.directory, filename), %s)" % options))
+    nose.tools.assert_equal(len(batches), count)
+    context.read_records = [record for batch in batches for record in batch]
+
+
+@then(u'the records read will match records {start:d} through {stop:d} of the records written.')
+def step_impl(context, start, stop):
+    nose.tools.assert_equal(context.read_records, context.records[start:stop])
+
+
+@when(u'appending the records written to {filename} with pipecat.store.{module}.write and {options}.')
+def step_impl(context, filename, module, options):
+    write = getattr(pipecat.store, module).write
+    for record in eval("write(iter(context.records), os.path.join(context.directory, filename), %s)" % options):
+        pass
+    context.records = context.records + context.records
+
+
+@then(u'the index {filename} will contain {count:d} entries.')
+def step_impl(context, filename, count):
+    path = os.path.join(context.directory, filename)
+    nose.tools.assert_equal(os.path.getsize(path), count * pipecat.store.pickle.index_dtype.itemsize)
+
+
+@then(u'the file {filename} will exist.')
+def step_impl(context, filename):
+    nose.tools.assert_true(os.path.exists(os.path.join(context.directory, filename)))
+
+
+@then(u'loading {filename} with pipecat.store.{module}.load and {options} will return a table with {count:d} rows.')
+def step_impl(context, filename, module, options, count):
+    load = getattr(pipecat.store, module).load
+    context.loaded = eval("load(os.path.join(context.directory, filename), %s)" % options)
+    nose.tools.assert_equal(len(context.loaded), count)
+
+
+@then(u'the loaded table will contain columns {keys}.')
+def step_impl(context, keys):
+    nose.tools.assert_equal(context.loaded.keys(), eval(keys))
+
+
+@then(u'the loaded table column {key} will match the {column} column of the records written.')
+def step_impl(context, key, column):
+    nose.tools.assert_equal(list(context.loaded[eval(key)]), [record[eval(column)] for record in context.records])
+
+
+@given(u'a rotating instance of pipecat.store.{module}.write in {dirname} with {options}.')
+def step_impl(context, module, dirname, options):
+    write = getattr(pipecat.store, module).write
+    context.pipe = eval("pipecat.store.rotate(context.pipe, write, os.path.join(context.directory, dirname), %s)" % options)
+
+
+@then(u'{dirname} will contain {count:d} segments.')
+def step_impl(context, dirname, count):
+    nose.tools.assert_equal(len(pipecat.store.segments(os.path.join(context.directory, dirname))), count)
+
+
+@then(u'the segments in {dirname} read with pipecat.store.{module}.read will contain {count:d} records.')
+def step_impl(context, dirname, module, count):
+    read = getattr(pipecat.store, module).read
+    context.read_records = list(pipecat.store.read_segments(read, os.path.join(context.directory, dirname)))
+    nose.tools.assert_equal(len(context.read_records), count)
+
+
+@then(
+    u'the segments in {dirname} read with pipecat.store.{module}.read between the {start:d}th and {stop:d}th timestamps '
+    u'will contain the records written between them.'
+    )
+def step_impl(context, dirname, module, start, stop):
+    read = getattr(pipecat.store, module).read
+    since = context.records[start]["timestamp"]
+    until = context.records[stop]["timestamp"]
+    records = list(pipecat.store.read_segments(read, os.path.join(context.directory, dirname), since=since, until=until))
+    nose.tools.assert_equal(records, [record for record in context.records if since <= record["timestamp"] < until])
+
+
+@then(u'converting {dirname} to {format} in {output} with {options} will write {count:d} files.')
+def step_impl(context, dirname, format, output, options, count):
+    paths = [os.path.join(context.directory, dirname)]
+    context.statistics = eval("pipecat.store.convert.convert(paths, os.path.join(context.directory, output), format=format, %s)" % options)
+    nose.tools.assert_equal(context.statistics["files"], count)
+    nose.tools.assert_equal(len(os.listdir(os.path.join(context.directory, output))), count)
+
+
+@then(u'converting {first} and {second} to {format} in {output} will raise {exception}.')
+def step_impl(context, first, second, format, output, exception):
+    paths = [os.path.join(context.directory, first), os.path.join(context.directory, second)]
+    with nose.tools.assert_raises(eval(exception)):
+        pipecat.store.convert.convert(paths, os.path.join(context.directory, output), format=format, processes=1)
+    nose.tools.assert_false(os.listdir(os.path.join(context.directory, output)))
+
+
+@then(u'the files in {dirname} read with pipecat.store.{module}.read will contain {count:d} records without {key}.')
+def step_impl(context, dirname, module, count, key):
+    key = eval(key)
+    read = getattr(pipecat.store, module).read
+    directory = os.path.join(context.directory, dirname)
+    records = [record for name in sorted(os.listdir(directory)) for record in read(os.path.join(directory, name))]
+    nose.tools.assert_equal(len(records), count)
+    nose.tools.assert_equal(context.statistics["records"], count)
+    for record in records:
+        nose.tools.assert_not_in(key, record)
+
+
+@then(u'following {filename} with pipecat.store.{module}.follow and {options} will return {count:d} records.')
+def step_impl(context, filename, module, options, count):
+    follow = getattr(pipecat.store, module).follow
+    context.read_records = list(eval("follow(os.path.join(context.directory, filename), %s)" % options))
+    nose.tools.assert_equal(len(context.read_records), count)
+
+
+@then(u'the records read will match the records written.')
+def step_impl(context):
+    nose.tools.assert_equal(context.read_records, context.records)
+
+
+@given(u'an instance of pipecat.store.cache with {option}={value}.')
+def step_impl(context, option, value):
+    context.pipe = pipecat.store.cache(context.pipe, **{option: eval(value)})
+
+
+@given(u'an instance of pipecat.store.Table with {options}.')
+def step_impl(context, options):
+    context.store_table = eval("pipecat.store.Table(%s)" % options)
+
+
+@then(u'table columns returned while appending {count:d} records will keep their values.')
+def step_impl(context, count):
+    views = []
+    for index in range(count):
+        context.store_table.append({"value": index, "name": "record %s" % index})
+        for key in ["value", "name"]:
+            views.append((context.store_table[key], list(context.store_table[key])))
+    for view, values in views:
+        nose.tools.assert_equal(list(view), values)
+
+
+@then(u'string columns returned while appending {count:d} records will match the strings appended.')
+def step_impl(context, count):
+    names = []
+    for index in range(count):
+        record = {"index": index}
+        if index % 3:
+            record["name"] = "name %s" % (index % 5)
+        context.store_table.append(record)
+        names.append(record.get("name"))
+        expected = names[-len(context.store_table):]
+        column = context.store_table["name"] if "name" in context.store_table.keys() else None
+        if column is not None:
+            nose.tools.assert_equal([None if numpy.ma.is_masked(name) else name for name in column], expected)
+
+
+@then(u'strings decoded from a dictionary encoded column of {count:d} records will be counted in the table bytes.')
+def step_impl(context, count):
+    for index in range(count):
+        context.store_table.append({"name": "name %s" % (index % 5)})
+    encoded = context.store_table.nbytes
+    names = context.store_table["name"]
+    nose.tools.assert_equal(len(names), count)
+    nose.tools.assert_greater_equal(context.store_table.nbytes, encoded + names.nbytes)
+
+
+@then(u'appending {count:d} empty records will store {rows:d} rows.')
+def step_impl(context, count, rows):
+    for index in range(count):
+        context.store_table.append({})
+    nose.tools.assert_equal(len(context.store_table), rows)
+
+
+@then(u'converting the table to {units} will match the columns converted using pint.')
+def step_impl(context, units):
+    units = eval(units)
+    table = context.pipe.table
+    expected = dict((key, table[key].to(target)) for key, target in units.items())
+    original = dict((key, (table[key], table[key].magnitude.copy())) for key in units)
+    table.convert(units)
+    for key, (values, magnitudes) in original.items():
+        numpy.testing.assert_array_equal(values.magnitude, magnitudes)
+    for key in units:
+        nose.tools.assert_equal(table[key].units, expected[key].units)
+        numpy.testing.assert_almost_equal(table[key].magnitude, expected[key].magnitude)
+
+
+@then(u'the table will contain {count} rows.')
+def step_impl(context, count):
+    nose.tools.assert_equal(len(context.pipe.table), int(count))
+
+
+@then(u'the table column {key} will be stored as {dtype} {units} values.')
+def step_impl(context, key, dtype, units):
+    column = context.pipe.table[eval(key)]
+    nose.tools.assert_equal(column.units, pipecat.units(units).units)
+    nose.tools.assert_equal(column.magnitude.dtype, numpy.dtype(dtype))
+
+
+@then(u'the table column {key} will be stored as {dtype} values.')
+def step_impl(context, key, dtype):
+    column = context.pipe.table[eval(key)]
+    nose.tools.assert_equal(column.dtype, numpy.dtype(dtype))
+
+
+@then(u'the table column {key} will be a view of the table storage.')
+def step_impl(context, key):
+    table = context.pipe.table
+    first = table[eval(key)].magnitude
+    second = table[eval(key)].magnitude
+    nose.tools.assert_true(numpy.shares_memory(first, second))
+
+
+@then(u'the last table value for {key} will be {value}.')
+def step_impl(context, key, value):
+    nose.tools.assert_equal(context.pipe.table[eval(key)][-1], pipecat.quantity(value))
+
+
+@then(u'the table column {key} will contain arrow timestamps.')
+def step_impl(context, key):
+    nose.tools.assert_is_instance(context.pipe.table[eval(key)][-1], arrow.arrow.Arrow)
+
+
+@then(u'the table column {key} will be cached until records are appended.')
+def step_impl(context, key):
+    table = context.pipe.table
+    key = eval(key)
+    nose.tools.assert_is(table[key], table[key])
+    column = table[key]
+    table.append({key: column[-1]})
+    nose.tools.assert_is_not(table[key], column)
+    nose.tools.assert_equal(len(table[key]), len(column) + 1)
+
+
+@then(u'the table will be stored in memory-mapped files.')
+def step_impl(context):
+    table = context.pipe.table
+    nose.tools.assert_true(table.spilled)
+    nose.tools.assert_is_instance(table[("battery", "voltage")].magnitude.base, numpy.memmap)
+
+
+@then(u'the table rows between the {start:d}th and {stop:d}th timestamps will be views of the table storage.')
+def step_impl(context, start, stop):
+    table = context.pipe.table
+    timestamps = table["timestamp"]
+    columns = table.between(timestamps[start], timestamps[stop])
+    expected = numpy.count_nonzero((timestamps >= timestamps[start]) & (timestamps < timestamps[stop]))
+    nose.tools.assert_equal(list(columns.keys()), table.keys())
+    for key, values in columns.items():
+        nose.tools.assert_equal(len(values), expected)
+        if values.dtype != object:
+            nose.tools.assert_true(numpy.shares_memory(getattr(values, "magnitude", values), getattr(table[key], "magnitude", table[key])))
+
+
+@then(u'the table row as of the last timestamp will match the last table row.')
+def step_impl(context):
+    table = context.pipe.table
+    record = table.asof(table["timestamp"][-1])
+    for key in table.keys():
+        nose.tools.assert_equal(record[key], table[key][-1])
+
+
+@then(u'the table column {key} will contain {count:d} values.')
+def step_impl(context, key, count):
+    column = context.pipe.table[eval(key)]
+    nose.tools.assert_equal(len(column), len(context.pipe.table))
+    nose.tools.assert_equal(numpy.ma.count(getattr(column, "magnitude", column)), count)
+
+
+@then(u'the table column {key} will be dictionary encoded.')
+def step_impl(context, key):
+    table = context.pipe.table
+    nose.tools.assert_is_not_none(table._columns[eval(key)].categories)
+    for category in numpy.unique(table[eval(key)]):
+        nose.tools.assert_true(numpy.array_equal(table.where(eval(key), category), table[eval(key)] == category))
+
+
+@then(u'the table will contain {count:d} rows where {key} is {value}.')
+def step_impl(context, count, key, value):
+    nose.tools.assert_equal(numpy.count_nonzero(context.pipe.table.where(eval(key), eval(value))), count)
+
+
+@then(u'the table columns will match an uncompressed table containing the same records.')
+def step_impl(context):
+    table = context.pipe.table
+    reference = pipecat.store.Table()
+    for record in context.records:
+        reference.append(record)
+    nose.tools.assert_equal(table.keys(), reference.keys())
+    for key in reference.keys():
+        nose.tools.assert_true(numpy.array_equal(getattr(table[key], "magnitude", table[key]), getattr(reference[key], "magnitude", reference[key])))
+
+
+@then(u'the table will use less memory than an uncompressed table containing the same records.')
+def step_impl(context):
+    reference = pipecat.store.Table()
+    for record in context.records:
+        reference.append(record)
+    nose.tools.assert_less(context.pipe.table.nbytes, reference.nbytes)
+
+
+@then(u'the table can be exported to a pandas data frame with a "{name}" column in {units}.')
+def step_impl(context, name, units):
+    table = context.pipe.table
+    frame = table.to_pandas()
+    nose.tools.assert_equal(len(frame), len(table))
+    nose.tools.assert_equal(len(frame.columns), len(table.keys()))
+    nose.tools.assert_equal(frame.attrs["units"][name], units)
+    nose.tools.assert_true(numpy.shares_memory(frame[name].to_numpy(), table[tuple(name.split("/"))].magnitude))
+
+
+@then(u'the table can be exported to a pandas data frame with a "{name}" column of UTC datetime64 values.')
+def step_impl(context, name):
+    table = context.pipe.table
+    frame = table.to_pandas()
+    nose.tools.assert_equal(frame[name].dtype.kind, "M")
+    nose.tools.assert_equal(frame[name].to_numpy()[-1], numpy.datetime64(table[name][-1].to("UTC").naive, "us"))
+
+
+@then(u'the table can be exported to an arrow table with a "{name}" column in {units}.')
+def step_impl(context, name, units):
+    table = context.pipe.table
+    arrow_table = table.to_arrow()
+    nose.tools.assert_equal(arrow_table.num_rows, len(table))
+    nose.tools.assert_equal(arrow_table.num_columns, len(table.keys()))
+    nose.tools.assert_equal(arrow_table.schema.field(name).metadata[b"units"], units.encode())
+    nose.tools.assert_true(numpy.shares_memory(arrow_table.column(name).chunk(0).to_numpy(), table[tuple(name.split("/"))].magnitude))
@@ -19,6 +19,7 @@
 from behave import *
 import nose.tools
 
+import pipecat.record
 import pipecat.utility
 
 
@@ -31,3 +32,39 @@ def step_impl(context):
 def step_impl(context):
     context.pipe = pipecat.utility.readline(context.pipe)
 
+
+@given(u'an instance of pipecat.utility.convert_units with {units}.')
+def step_impl(context, units):
+    context.units = eval(units)
+    context.unconverted = []
+
+    def unconverted(source):
+        for record in source:
+            context.unconverted.append(dict(record.items()))
+            yield record
+
+    context.pipe = pipecat.utility.convert_units(unconverted(context.pipe), context.units)
+
+
+@then(u'the converted records will match the input records converted using pint.')
+def step_impl(context):
+    nose.tools.assert_equal(len(context.records), len(context.unconverted))
+    for record, unconverted in zip(context.records, context.unconverted):
+        for key, units in context.units.items():
+            if key not in unconverted:
+                nose.tools.assert_not_in(key, record)
+                continue
+            expected = unconverted[key].to(units)
+            nose.tools.assert_equal(record[key].units, expected.units)
+            nose.tools.assert_almost_equal(record[key].magnitude, expected.magnitude)
+
+
+@then(u'the converted records will store magnitudes in the converted units.')
+def step_impl(context):
+    for record in context.records:
+        nose.tools.assert_is_instance(record, pipecat.record.CompactRecord)
+        if isinstance(record, pipecat.record.SchemaRecord):
+            nose.tools.assert_is_not_none(record.positional())
+        for key, units in context.units.items():
+            if key in record:
+                nose.tools.assert_equal(pipecat.units.Unit(record.magnitude(key)[1]), pipecat.units.Unit(units))
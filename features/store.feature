@@ -0,0 +1,185 @@
+Feature: pipecat.store
+
+    Scenario: pipecat.store.cache
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.store.cache.
+        Then the pipe can be iterated to completion.
+        And the table will contain 1390 rows.
+        And the table column ("battery", "voltage") will be stored as float64 volt values.
+        And the table column ("charger", "mode") will be stored as object values.
+        And the table column ("charger", "mode") will be dictionary encoded.
+        And the table will contain 1287 rows where ("charger", "mode") is "charge".
+        And the table column ("battery", "voltage") will be a view of the table storage.
+        And the table column ("battery", "voltage") will be cached until records are appended.
+
+    Scenario: pipecat.store.cache with bounded rows
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.store.cache with max_rows=100.
+        Then the pipe can be iterated to completion.
+        And the table will contain 100 rows.
+        And the last table value for ("battery", "voltage") will be 4.119 volt.
+
+    Scenario: pipecat.store.Table views with bounded rows
+        Given an instance of pipecat.store.Table with max_rows=4, max_categories=None.
+        Then table columns returned while appending 20 records will keep their values.
+
+    Scenario: pipecat.store.Table dictionary encoded columns with bounded rows
+        Given an instance of pipecat.store.Table with max_rows=7.
+        Then string columns returned while appending 50 records will match the strings appended.
+
+    Scenario: pipecat.store.Table decoded strings
+        Given an instance of pipecat.store.Table with max_categories=256.
+        Then strings decoded from a dictionary encoded column of 100 records will be counted in the table bytes.
+
+    Scenario: pipecat.store.Table with bounded bytes and no columns
+        Given an instance of pipecat.store.Table with max_bytes=1000.
+        Then appending 3 empty records will store 0 rows.
+
+    Scenario: pipecat.store.cache spilling to disk
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.store.cache with spill_threshold=10000.
+        Then the pipe can be iterated to completion.
+        And the table will contain 1390 rows.
+        And the table will be stored in memory-mapped files.
+        And the last table value for ("battery", "voltage") will be 4.119 volt.
+
+    Scenario: pipecat.store.Table time-range queries
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And an instance of pipecat.store.cache.
+        Then the pipe can be iterated to completion.
+        And the table column "timestamp" will contain arrow timestamps.
+        And the table rows between the 10th and 20th timestamps will be views of the table storage.
+        And the table row as of the last timestamp will match the last table row.
+
+    Scenario: pipecat.store.Table time-range queries with bounded rows
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And an instance of pipecat.store.cache with max_rows=100.
+        Then the pipe can be iterated to completion.
+        And the table will contain 100 rows.
+        And the table column "timestamp" will contain arrow timestamps.
+        And the table rows between the 10th and 20th timestamps will be views of the table storage.
+        And the table row as of the last timestamp will match the last table row.
+
+    Scenario: pipecat.store.Table time-range queries with datetime64 timestamps
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And an instance of pipecat.store.cache with datetime64=["timestamp"].
+        Then the pipe can be iterated to completion.
+        And the table column "timestamp" will be stored as datetime64[us] values.
+        And the table rows between the 10th and 20th timestamps will be views of the table storage.
+        And the table row as of the last timestamp will match the last table row.
+
+    Scenario: pipecat.store.cache with heterogeneous records
+        Given a file named gps.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.gps.nmea
+        And an instance of pipecat.store.cache.
+        Then the pipe can be iterated to completion.
+        And the table will contain 381 rows.
+        And the table column "altitude" will contain 76 values.
+        And the table column "speed" will contain 76 values.
+        And the table column "id" will contain 381 values.
+
+    Scenario: pipecat.store.cache with compressed columns
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And an instance of pipecat.store.cache with compressed=True.
+        When iterating through the pipe contents.
+        Then the table will contain 1390 rows.
+        And the table columns will match an uncompressed table containing the same records.
+        And the table will use less memory than an uncompressed table containing the same records.
+
+    Scenario: pipecat.store.Table export to pandas
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And an instance of pipecat.store.cache.
+        Then the pipe can be iterated to completion.
+        And the table can be exported to a pandas data frame with a "battery/voltage" column in volt.
+        And the table can be exported to a pandas data frame with a "timestamp" column of UTC datetime64 values.
+
+    Scenario: pipecat.store.Table export to arrow
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.store.cache.
+        Then the pipe can be iterated to completion.
+        And the table can be exported to an arrow table with a "battery/voltage" column in volt.
+
+    Scenario: pipecat.store.rotate
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And a rotating instance of pipecat.store.pickle.write in segments with max_bytes=200000.
+        When iterating through the pipe contents.
+        Then segments will contain 7 segments.
+        And the segments in segments read with pipecat.store.pickle.read will contain 1390 records.
+        And the records read will match the records written.
+        And the segments in segments read with pipecat.store.pickle.read between the 200th and 800th timestamps will contain the records written between them.
+
+    Scenario: pipecat.store.convert
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And a rotating instance of pipecat.store.pickle.write in segments with max_bytes=200000.
+        When iterating through the pipe contents.
+        Then converting segments to columnar in converted with merge_bytes=600000, processes=2, drop=[("battery", "cell1", "voltage")] will write 3 files.
+        And the files in converted read with pipecat.store.columnar.read will contain 1390 records without ("battery", "cell1", "voltage").
+
+    Scenario: pipecat.store.convert with indexed segments
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.add_timestamp.
+        And a temporary directory.
+        And a rotating instance of pipecat.store.pickle.write in segments with max_bytes=200000, index=True.
+        When iterating through the pipe contents.
+        Then converting segments to columnar in converted with merge_bytes=600000, processes=1, drop=[("battery", "cell1", "voltage")] will write 3 files.
+        And the files in converted read with pipecat.store.columnar.read will contain 1390 records without ("battery", "cell1", "voltage").
+
+    Scenario: pipecat.store.convert with conflicting output names
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And a temporary directory.
+        And an instance of pipecat.store.pickle.write to charger.pickle with flush_count=100.
+        And an instance of pipecat.store.csv.write to charger.csv with flush_count=100.
+        When iterating through the pipe contents.
+        Then converting charger.pickle and charger.csv to columnar in converted will raise ValueError.
+
+    Scenario: pipecat.store.Table unit conversion
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.store.cache with compressed=True.
+        Then the pipe can be iterated to completion.
+        And converting the table to {("battery", "voltage"): "millivolt", ("charger", "temperature", "internal"): "degF"} will match the columns converted using pint.
+
+    Scenario: pipecat.store.Table unit conversion without compression
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.store.cache.
+        Then the pipe can be iterated to completion.
+        And converting the table to {("battery", "voltage"): "millivolt", ("charger", "temperature", "internal"): "degF"} will match the columns converted using pint.
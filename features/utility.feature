@@ -14,3 +14,21 @@ Feature: pipecat.utility
         When iterating through the pipe contents.
         Then every record will contain a "line" key with a string value.
         And every record will contain a "timestamp" key with an arrow value.
+
+    Scenario: pipecat.utility.convert_units
+        Given a file named icharger208b-charging.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.charger.icharger208b
+        And an instance of pipecat.utility.convert_units with {("battery", "voltage"): "millivolt", ("charger", "temperature", "internal"): "degF"}.
+        When iterating through the pipe contents.
+        Then the converted records will match the input records converted using pint.
+        And the converted records will store magnitudes in the converted units.
+
+    Scenario: pipecat.utility.convert_units with lazy records
+        Given a file named gps.
+        And an instance of pipecat.utility.readline.
+        And an instance of pipecat.device.gps.nmea
+        And an instance of pipecat.utility.convert_units with {"altitude": "feet", "speed": "meter / second"}.
+        When iterating through the pipe contents.
+        Then the converted records will match the input records converted using pint.
+        And the converted records will store magnitudes in the converted units.
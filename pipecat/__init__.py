@@ -21,17 +21,120 @@ instruments."""
 from __future__ import absolute_import, division, print_function
 
 import logging
-
-import pint
+import os
 
 __version__ = "0.4.0-dev"
 
 log = logging.getLogger(__name__)
 log.addHandler(logging.NullHandler())
 
-units = pint.UnitRegistry()
+_registry = None
+
+_common_units = ["volts", "milliamps", "hours", "degC", "knots", "degrees", "radians", "meters", "seconds"]
+
+
+def _cache_directory():
+    """Return the directory where pipecat caches data, or `None` if caching is disabled."""
+    directory = os.environ.get("PIPECAT_CACHE", os.path.join(os.path.expanduser("~"), ".pipecat", "cache"))
+    return directory or None
+
+
+def _unit_registry():
+    """Return the unit registry, creating it the first time it's needed.
+
+    Creating a :class:`pint.UnitRegistry` parses the pint unit definitions,
+    which dominates the time required to start programs that use pipecat, so
+    it is deferred until units or quantities are actually used.  The parsed
+    definitions are cached on disk, in a directory specific to the pint
+    version, and pint only reuses them if the definitions haven't changed.
+    The units used by the device modules are looked up in advance, so the
+    first quantities are cheap to create.
+    """
+    global _registry # pylint: disable=global-statement
+    if _registry is None:
+        import pint # pylint: disable=import-error
+
+        registry = None
+        directory = _cache_directory()
+        if directory is not None:
+            try:
+                registry = pint.UnitRegistry(cache_folder=os.path.join(directory, "pint-%s" % pint.__version__))
+            except Exception as e: # pylint: disable=broad-except
+                log.debug("Not caching unit definitions: %s", e)
+        if registry is None:
+            registry = pint.UnitRegistry()
+
+        for name in _common_units:
+            registry.Quantity(1.0, getattr(registry, name))
+        _registry = registry
+    return _registry
+
+
+_conversions = {}
+
+
+def _conversion(source, target):
+    """Return the scale and offset that convert magnitudes between two units.
+
+    Conversions are computed once for each pair of units and cached.
+    Returns `None` if the conversion isn't affine, in which case values must
+    be converted using :meth:`pint.Quantity.to`.
+    """
+    key = (source, target)
+    if key not in _conversions:
+        offset = quantity(0.0, source).to(target).magnitude
+        scale = quantity(1.0, source).to(target).magnitude - offset
+        check = quantity(1000.0, source).to(target).magnitude
+        affine = abs(check - (1000.0 * scale + offset)) <= 1e-9 * max(1.0, abs(check))
+        _conversions[key] = (scale, offset) if affine else None
+    return _conversions[key]
+
+
+class _Units(object):
+    """Forwards attribute access to the unit registry."""
+    __slots__ = []
+
+    def __getattr__(self, name):
+        return getattr(_unit_registry(), name)
+
+    def __getitem__(self, name):
+        return _unit_registry()[name]
+
+    def __call__(self, *args, **kwargs):
+        return _unit_registry()(*args, **kwargs)
+
+    def __dir__(self):
+        return dir(_unit_registry())
+
+    def __repr__(self):
+        return repr(_unit_registry())
+
+
+class _QuantityType(type):
+    """Makes :data:`quantity` behave like the quantity class of the unit registry."""
+    def __call__(cls, *args, **kwargs):
+        return _unit_registry().Quantity(*args, **kwargs)
+
+    def __getattr__(cls, name):
+        return getattr(_unit_registry().Quantity, name)
+
+    def __instancecheck__(cls, instance):
+        # Quantities can't exist until the registry does.
+        return _registry is not None and isinstance(instance, _registry.Quantity)
+
+    def __subclasscheck__(cls, subclass):
+        return _registry is not None and issubclass(subclass, _registry.Quantity)
+
+
+units = _Units()
 """Provides units for defining and converting physical quantities.
 
+The underlying :class:`pint.UnitRegistry` is created the first time a unit is
+used.  Pipecat caches the parsed pint unit definitions in `~/.pipecat/cache`
+to speed up subsequent programs.  Set the `PIPECAT_CACHE` environment
+variable to use a different directory, or to an empty string to disable
+the cache.
+
 Examples
 --------
 >>> charge = 330 * pipecat.units.milliamps * pipecat.units.hours
@@ -40,9 +143,11 @@ Examples
 <Quantity(73.4000004, 'degF')>
 """
 
-quantity = units.Quantity
+quantity = _QuantityType(str("quantity"), (object,), {"__slots__": []})
 """Used to create and store physical quantities.
 
+Use :func:`isinstance` with `quantity` to test whether a value is a quantity.
+
 Examples
 --------
 >>> timeout = pipecat.quantity(5, pipecat.units.minutes)
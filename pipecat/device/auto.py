@@ -22,13 +22,11 @@ from __future__ import absolute_import, division, print_function
 import sys
 import time
 
-import obd as obdii
-
 from pipecat import quantity, units
 from pipecat.record import add_field
 
 
-def obd(connection, commands=None, rate=quantity(5, units.second)):
+def obd(connection, commands=None, rate=None):
     """Retrieve OBD-II data from an automobile.
 
     This component requires the `Python-OBD` module (http://python-obd.readthedocs.io).
@@ -36,8 +34,8 @@ def obd(connection, commands=None, rate=quantity(5, units.second)):
     Parameters
     ----------
     connection: :class:`obd.OBD` instance, required.
-    rate: time quantity, required
-        Rate at which data will be retrieved.
+    rate: time quantity, optional
+        Rate at which data will be retrieved.  Defaults to 5 seconds.
 
     Yields
     ------
@@ -45,6 +43,11 @@ def obd(connection, commands=None, rate=quantity(5, units.second)):
         Records will contain OBD-II data retrieved from an automobile computer.
     """
 
+    import obd as obdii # pylint: disable=import-error
+
+    if rate is None:
+        rate = quantity(5, units.second)
+
     # Caller must supply an obd.OBD instance that's already connected.
     if not (isinstance(connection, obdii.OBD) and connection.is_connected()):
         raise ValueError("A valid obd.OBD connection is required.")
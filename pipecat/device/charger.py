@@ -19,8 +19,8 @@
 
 from __future__ import absolute_import, division, print_function
 
-from pipecat import quantity, units
-from pipecat.record import add_field
+from pipecat import units
+from pipecat.record import schema
 
 def icharger208b(source, key):
     """Parse data from an iCharger 208B battery charger.
@@ -55,7 +55,7 @@ def icharger208b(source, key):
 
     Yields
     ------
-    record: dict
+    record: :class:`pipecat.record.SchemaRecord`
         Records will contain information including the charge mode, supply
         voltage, battery voltage, battery current, internal and external
         charger temperature, and the total charge added-to / removed-from the
@@ -77,24 +77,42 @@ def icharger208b(source, key):
         12: "discharge-external",
     }
 
+    volts = units.volts
+    record_type = schema("ICharger208B", [
+        (("charger", "mode"), None),
+        (("charger", "supply"), volts),
+        (("battery", "voltage"), volts),
+        (("battery", "cell1", "voltage"), volts),
+        (("battery", "cell2", "voltage"), volts),
+        (("battery", "cell3", "voltage"), volts),
+        (("battery", "cell4", "voltage"), volts),
+        (("battery", "cell5", "voltage"), volts),
+        (("battery", "cell6", "voltage"), volts),
+        (("battery", "cell7", "voltage"), volts),
+        (("battery", "cell8", "voltage"), volts),
+        (("battery", "current"), units.milliamps),
+        (("charger", "temperature", "internal"), units.degC),
+        (("charger", "temperature", "external"), units.degC),
+        (("battery", "charge"), units.milliamps * units.hours),
+    ])
+
     for record in source:
         raw = record[key].strip().split(";")
 
-        record = dict()
-        add_field(record, ("charger", "mode"), modes[int(raw[1])])
-        add_field(record, ("charger", "supply"), quantity(float(raw[3]) / 1000, units.volts))
-        add_field(record, ("battery", "voltage"), quantity(float(raw[4]) / 1000, units.volts))
-        add_field(record, ("battery", "cell1", "voltage"), quantity(float(raw[6]) / 1000, units.volts))
-        add_field(record, ("battery", "cell2", "voltage"), quantity(float(raw[7]) / 1000, units.volts))
-        add_field(record, ("battery", "cell3", "voltage"), quantity(float(raw[8]) / 1000, units.volts))
-        add_field(record, ("battery", "cell4", "voltage"), quantity(float(raw[9]) / 1000, units.volts))
-        add_field(record, ("battery", "cell5", "voltage"), quantity(float(raw[10]) / 1000, units.volts))
-        add_field(record, ("battery", "cell6", "voltage"), quantity(float(raw[11]) / 1000, units.volts))
-        add_field(record, ("battery", "cell7", "voltage"), quantity(float(raw[12]) / 1000, units.volts))
-        add_field(record, ("battery", "cell8", "voltage"), quantity(float(raw[13]) / 1000, units.volts))
-        add_field(record, ("battery", "current"), quantity(float(raw[5]) * 10, units.milliamps))
-        add_field(record, ("charger", "temperature", "internal"), quantity(float(raw[14]) / 10, units.degC))
-        add_field(record, ("charger", "temperature", "external"), quantity(float(raw[15]) / 10, units.degC))
-        add_field(record, ("battery", "charge"), quantity(float(raw[16]), units.milliamps * units.hours))
-
-        yield record
+        yield record_type([
+            modes[int(raw[1])],
+            float(raw[3]) / 1000,
+            float(raw[4]) / 1000,
+            float(raw[6]) / 1000,
+            float(raw[7]) / 1000,
+            float(raw[8]) / 1000,
+            float(raw[9]) / 1000,
+            float(raw[10]) / 1000,
+            float(raw[11]) / 1000,
+            float(raw[12]) / 1000,
+            float(raw[13]) / 1000,
+            float(raw[5]) * 10,
+            float(raw[14]) / 10,
+            float(raw[15]) / 10,
+            float(raw[16]),
+        ])
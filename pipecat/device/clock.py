@@ -24,7 +24,7 @@ import time
 import pipecat
 
 
-def metronome(rate=pipecat.quantity(1.0, pipecat.units.seconds)):
+def metronome(rate=None):
     """Generate an empty record at fixed time intervals using the host clock.
 
     Typically, you would use functions such as
@@ -43,14 +43,16 @@ def metronome(rate=pipecat.quantity(1.0, pipecat.units.seconds)):
 
     Parameters
     ----------
-    rate: time quantity, required
-        The amount of time to wait between records.
+    rate: time quantity, optional
+        The amount of time to wait between records.  Defaults to 1 second.
 
     Yields
     ------
     record: dict
         Empty record returned at fixed time intervals.
     """
+    if rate is None:
+        rate = pipecat.quantity(1.0, pipecat.units.seconds)
     delay = rate.to(pipecat.units.seconds).magnitude
     last_time = time.time()
     while True:
@@ -40,7 +40,7 @@ def nmea(source, key):
 
     Yields
     ------
-    record: dict
+    record: :class:`pipecat.record.LazyRecord`
         Records will contain multiple fields containing time, position, speed,
         heading, pitch, roll, and quality information based on device sending
         the data.  Support is provided for GPGGA, GPGLL, GPRMC, GPTXT, HCHDG,
@@ -48,15 +48,34 @@ def nmea(source, key):
     """
     def latitude(degrees, hemisphere):
         degrees = (1.0 if hemisphere == "N" else -1.0) * (float(degrees[:2]) + (float(degrees[2:]) / 60.0))
-        return pipecat.quantity(degrees, pipecat.units.degrees)
+        return degrees
 
     def longitude(degrees, hemisphere):
         degrees = (1.0 if hemisphere == "E" else -1.0) * (float(degrees[:3]) + (float(degrees[3:]) / 60.0))
-        return pipecat.quantity(degrees, pipecat.units.degrees)
+        return degrees
 
     def variation(degrees, hemisphere):
         degrees = (1.0 if hemisphere == "E" else -1.0) * float(degrees)
-        return pipecat.quantity(degrees, pipecat.units.degrees)
+        return degrees
+
+    degrees = pipecat.units.degrees
+    meters = pipecat.units.meters
+    fields = {
+        "latitude": degrees,
+        "longitude": degrees,
+        "altitude": meters,
+        "geoid-height": meters,
+        "speed": pipecat.units.knots,
+        "track": degrees,
+        "variation": degrees,
+        "heading": degrees,
+        "roll": degrees,
+        "pitch": degrees,
+        "heave": meters,
+        "roll-accuracy": degrees,
+        "pitch-accuracy": degrees,
+        "heading-accuracy": degrees,
+    }
 
     for record in source:
         sentence = record.get(key)
@@ -83,8 +102,8 @@ def nmea(source, key):
             pipecat.record.add_field(record, "quality", int(sentence[6]))
             pipecat.record.add_field(record, "satellites", int(sentence[7]))
             pipecat.record.add_field(record, "dop", float(sentence[8]))
-            pipecat.record.add_field(record, "altitude", pipecat.quantity(float(sentence[9]), pipecat.units.meters))
-            pipecat.record.add_field(record, "geoid-height", pipecat.quantity(float(sentence[11]), pipecat.units.meters))
+            pipecat.record.add_field(record, "altitude", float(sentence[9]))
+            pipecat.record.add_field(record, "geoid-height", float(sentence[11]))
         elif sentence[0] == "GPGLL":
             pipecat.record.add_field(record, "latitude", latitude(sentence[1], sentence[2]))
             pipecat.record.add_field(record, "longitude", longitude(sentence[3], sentence[4]))
@@ -95,23 +114,23 @@ def nmea(source, key):
             pipecat.record.add_field(record, "active", sentence[2] == "A")
             pipecat.record.add_field(record, "latitude", latitude(sentence[3], sentence[4]))
             pipecat.record.add_field(record, "longitude", longitude(sentence[5], sentence[6]))
-            pipecat.record.add_field(record, "speed", pipecat.quantity(float(sentence[7]), pipecat.units.knots))
-            pipecat.record.add_field(record, "track", pipecat.quantity(float(sentence[8]), pipecat.units.degrees))
+            pipecat.record.add_field(record, "speed", float(sentence[7]))
+            pipecat.record.add_field(record, "track", float(sentence[8]))
             pipecat.record.add_field(record, "date", sentence[9])
             pipecat.record.add_field(record, "variation", variation(sentence[10], sentence[11]))
         elif sentence[0] == "GPTXT":
             pipecat.record.add_field(record, "text", sentence[4])
         elif sentence[0] == "HCHDG":
-            pipecat.record.add_field(record, "heading", pipecat.quantity(float(sentence[1]), pipecat.units.degree))
+            pipecat.record.add_field(record, "heading", float(sentence[1]))
             pipecat.record.add_field(record, "variation", variation(sentence[4], sentence[5]))
         elif sentence[0] == "PASHR":
             pipecat.record.add_field(record, "time", sentence[1])
-            pipecat.record.add_field(record, "heading", pipecat.quantity(float(sentence[2]), pipecat.units.degree))
-            pipecat.record.add_field(record, "roll", pipecat.quantity(float(sentence[4]), pipecat.units.degree))
-            pipecat.record.add_field(record, "pitch", pipecat.quantity(float(sentence[5]), pipecat.units.degree))
-            pipecat.record.add_field(record, "heave", pipecat.quantity(float(sentence[6]), pipecat.units.meters))
-            pipecat.record.add_field(record, "roll-accuracy", pipecat.quantity(float(sentence[7]), pipecat.units.degrees))
-            pipecat.record.add_field(record, "pitch-accuracy", pipecat.quantity(float(sentence[8]), pipecat.units.degrees))
-            pipecat.record.add_field(record, "heading-accuracy", pipecat.quantity(float(sentence[9]), pipecat.units.degrees))
-
-        yield record
+            pipecat.record.add_field(record, "heading", float(sentence[2]))
+            pipecat.record.add_field(record, "roll", float(sentence[4]))
+            pipecat.record.add_field(record, "pitch", float(sentence[5]))
+            pipecat.record.add_field(record, "heave", float(sentence[6]))
+            pipecat.record.add_field(record, "roll-accuracy", float(sentence[7]))
+            pipecat.record.add_field(record, "pitch-accuracy", float(sentence[8]))
+            pipecat.record.add_field(record, "heading-accuracy", float(sentence[9]))
+
+        yield pipecat.record.LazyRecord(fields, record)
@@ -20,22 +20,22 @@
 from __future__ import absolute_import, division, print_function
 
 from pipecat import quantity, units
-from pipecat.record import add_field
+from pipecat.record import schema
 
 
-def ios(rate=quantity(1, units.second)):
+def ios(rate=None):
     """Retrieve motion information from an iOS device.
 
     This component requires the `motion` module provided by Pythonista.
 
     Parameters
     ----------
-    rate: time quantity, required
-        Rate at which motion data will be retrieved.
+    rate: time quantity, optional
+        Rate at which motion data will be retrieved.  Defaults to 1 second.
 
     Yields
     ------
-    record: dict
+    record: :class:`pipecat.record.SchemaRecord`
         Records will contain information including the current acceleration due
         to gravity and the user, along with device attitude.
     """
@@ -43,28 +43,28 @@ def ios(rate=quantity(1, units.second)):
     import time
     import motion # pylint: disable=import-error
 
+    if rate is None:
+        rate = quantity(1, units.second)
     rate = rate.to(units.seconds).magnitude
 
+    acceleration_units = units.meters * units.seconds * units.seconds
+    record_type = schema("IOSMotion", [
+        (("gravity", "x"), acceleration_units),
+        (("gravity", "y"), acceleration_units),
+        (("gravity", "z"), acceleration_units),
+        (("acceleration", "x"), acceleration_units),
+        (("acceleration", "y"), acceleration_units),
+        (("acceleration", "z"), acceleration_units),
+        (("attitude", "roll"), units.radians),
+        (("attitude", "pitch"), units.radians),
+        (("attitude", "yaw"), units.radians),
+    ])
+
     motion.start_updates()
 
     try:
         while True:
-            gravity = quantity(motion.get_gravity(), units.meters * units.seconds * units.seconds)
-            acceleration = quantity(motion.get_user_acceleration(), units.meters * units.seconds * units.seconds)
-            attitude = quantity(motion.get_attitude(), units.radians)
-
-            record = dict()
-            add_field(record, ("gravity", "x"), gravity[0])
-            add_field(record, ("gravity", "y"), gravity[1])
-            add_field(record, ("gravity", "z"), gravity[2])
-
-            add_field(record, ("acceleration", "x"), acceleration[0])
-            add_field(record, ("acceleration", "y"), acceleration[1])
-            add_field(record, ("acceleration", "z"), acceleration[2])
-
-            add_field(record, ("attitude", "roll"), attitude[0])
-            add_field(record, ("attitude", "pitch"), attitude[1])
-            add_field(record, ("attitude", "yaw"), attitude[2])
+            record = record_type(list(motion.get_gravity()) + list(motion.get_user_acceleration()) + list(motion.get_attitude()))
 
             yield record
 
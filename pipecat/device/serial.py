@@ -22,8 +22,6 @@ from __future__ import absolute_import, division, print_function
 
 import time
 
-import serial
-
 import pipecat.utility
 
 
@@ -42,6 +40,8 @@ def readline(*args, **kwargs):
     record: dict
         Records will contain each line of text read from the port.
     """
+    import serial # pylint: disable=import-error
+
     poll = kwargs.pop("poll", pipecat.quantity(5, pipecat.units.seconds)).to(pipecat.units.seconds).magnitude
 
     while True:
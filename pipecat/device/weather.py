@@ -19,8 +19,6 @@
 
 from __future__ import absolute_import, division, print_function
 
-import arrow
-
 from pipecat import quantity, units
 from pipecat.record import add_field
 
@@ -38,6 +36,7 @@ def metars(source, key="xml"):
     record: dict
         Records will contain METAR data extracted from XML.
     """
+    import arrow
 
     for record in source:
         response = record[key]
@@ -24,8 +24,6 @@ from six.moves import BaseHTTPServer
 import logging
 import time
 
-import requests
-
 import pipecat.record
 
 log = logging.getLogger(__name__)
@@ -47,6 +45,8 @@ def get(*args, **kwargs):
         Records will contain `status`, `(header, key)`, `encoding`, and `body`
         keys containing the results returned from each request.
     """
+    import requests
+
     poll = kwargs.pop("poll", pipecat.quantity(5, pipecat.units.seconds)).to(pipecat.units.seconds).magnitude
 
     while True:
@@ -58,7 +58,7 @@ def count(source, count, name=None): # pylint: disable=redefined-outer-name
         yield next(source)
 
 
-def duration(source, duration, timeout=pipecat.quantity(0.1, pipecat.units.seconds), name=None): # pylint: disable=redefined-outer-name
+def duration(source, duration, timeout=None, name=None): # pylint: disable=redefined-outer-name
     """Return records from a source until a fixed time duration has expired.
 
     Examples
@@ -79,6 +79,7 @@ def duration(source, duration, timeout=pipecat.quantity(0.1, pipecat.units.secon
     timeout: time quantity, optional.
         Limits the amount of time to block while waiting for output from
         `source`.  This affects the accuracy of when the function exits.
+        Defaults to 0.1 seconds.
     name: string, optional.
         Optional name for this :ref:`Record generator <record-generators>` to
         use in log output.  Defaults to the function name.
@@ -87,7 +88,7 @@ def duration(source, duration, timeout=pipecat.quantity(0.1, pipecat.units.secon
         name = source.__name__
 
     end_time = time.time() + duration.to(pipecat.units.seconds).magnitude
-    queue_timeout = timeout.to(pipecat.units.seconds).magnitude
+    queue_timeout = 0.1 if timeout is None else timeout.to(pipecat.units.seconds).magnitude
 
     queue = pipecat.queue.Queue()
     shutdown = threading.Event()
@@ -117,7 +118,7 @@ def duration(source, duration, timeout=pipecat.quantity(0.1, pipecat.units.secon
         shutdown.set()
 
 
-def timeout(source, timeout, initial=pipecat.quantity(1, pipecat.units.hours), name=None): # pylint: disable=redefined-outer-name
+def timeout(source, timeout, initial=None, name=None): # pylint: disable=redefined-outer-name
     """Return records from another source until they stop arriving.
 
     Parameters
@@ -126,7 +127,7 @@ def timeout(source, timeout, initial=pipecat.quantity(1, pipecat.units.hours), n
     timeout: time quantity, required
         Maximum time to wait for the next record before exiting.
     initial: time quantity, optional
-        Maximum time to wait for the first record.
+        Maximum time to wait for the first record.  Defaults to 1 hour.
     name: string, optional.
         Optional name for this :ref:`Record generator <record-generators>` to
         use in log output.  Defaults to the function name.
@@ -134,7 +135,7 @@ def timeout(source, timeout, initial=pipecat.quantity(1, pipecat.units.hours), n
     if name is None:
         name = source.__name__
 
-    initial_timeout = initial.to(pipecat.units.seconds).magnitude
+    initial_timeout = 3600.0 if initial is None else initial.to(pipecat.units.seconds).magnitude
     regular_timeout = timeout.to(pipecat.units.seconds).magnitude
     current_timeout = initial_timeout
 
@@ -21,6 +21,8 @@ from __future__ import absolute_import, division, print_function
 
 import sys
 
+from six.moves import collections_abc
+
 import pipecat
 
 
@@ -71,3 +73,290 @@ def remove_field(record, key):
         Record key to be removed.
     """
     record.pop(key, None)
+
+
+class CompactRecord(collections_abc.MutableMapping):
+    """Base class for records that store quantities as raw magnitudes.
+
+    Compact records implement the mapping protocol, so they can be used
+    anywhere a dict record is used, and pickled compact records are
+    unpickled as dicts.  Subclasses implement :meth:`magnitudes`, which
+    consumers such as :class:`pipecat.store.Table` use to retrieve the
+    stored magnitudes without creating quantities.
+    """
+    __slots__ = []
+
+    def __reduce__(self):
+        return (dict, (dict(self.items()),))
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def magnitude(self, key):
+        """Return the stored contents of one field.
+
+        Parameters
+        ----------
+        key: :ref:`Record key <record-keys>`, required
+
+        Returns
+        -------
+        field: (magnitude, units) tuple
+            `units` is `None` for values that aren't stored as magnitudes, in
+            which case `magnitude` is the value itself.
+
+        Raises
+        ------
+        KeyError
+            If the record doesn't contain `key`.
+        """
+        raise NotImplementedError() # pragma: no cover
+
+    def magnitudes(self):
+        """Return the stored contents of the record.
+
+        Returns
+        -------
+        fields: list of (key, magnitude, units) tuples
+            `units` is `None` for values that aren't stored as magnitudes,
+            in which case `magnitude` is the value itself.
+        """
+        raise NotImplementedError() # pragma: no cover
+
+
+class LazyRecord(CompactRecord):
+    """Record that stores raw magnitudes, creating quantities on demand.
+
+    Device parsers create many records with the same keys and units, and
+    creating a :class:`pint.Quantity` for every field dominates the cost of
+    parsing.  A lazy record stores the magnitude of each field, along with a
+    `units` dict mapping keys to units that is shared by every record with
+    the same layout.  Quantities are only created when a field is read.
+
+    Lazy records can be used anywhere a dict record is used.  Fields that
+    are assigned or deleted behave exactly as they would with a dict, and
+    pickled lazy records are unpickled as dicts.  Use :meth:`magnitudes` to
+    retrieve the stored magnitudes without creating quantities, as
+    :class:`pipecat.store.Table` does.
+
+    Parameters
+    ----------
+    units: dict, required
+        Maps :ref:`Record keys <record-keys>` to the units of their values.
+        Values for keys that aren't in `units` are returned unmodified.  The
+        dict is shared, and must not be modified once records are created.
+    magnitudes: dict, optional
+        Maps :ref:`Record keys <record-keys>` to their magnitudes.
+    """
+    __slots__ = ["_units", "_magnitudes", "_quantities"]
+
+    def __init__(self, units, magnitudes=None):
+        self._units = units
+        self._magnitudes = {} if magnitudes is None else magnitudes
+        self._quantities = None
+
+    def __getitem__(self, key):
+        if self._quantities is not None and key in self._quantities:
+            return self._quantities[key]
+        value = self._magnitudes[key]
+        units = self._units.get(key)
+        if units is None:
+            return value
+        value = pipecat.quantity(value, units)
+        if self._quantities is None:
+            self._quantities = {}
+        self._quantities[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._units:
+            self._units = dict(self._units)
+            del self._units[key]
+        if self._quantities is not None:
+            self._quantities.pop(key, None)
+        self._magnitudes[key] = value
+
+    def __delitem__(self, key):
+        del self._magnitudes[key]
+        if self._quantities is not None:
+            self._quantities.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._magnitudes)
+
+    def __len__(self):
+        return len(self._magnitudes)
+
+    def __contains__(self, key):
+        return key in self._magnitudes
+
+    def copy(self):
+        """Return a shallow copy of the record."""
+        return LazyRecord(self._units, dict(self._magnitudes))
+
+    def magnitude(self, key):
+        return self._magnitudes[key], self._units.get(key)
+
+    def magnitudes(self):
+        units = self._units
+        return [(key, value, units.get(key)) for key, value in self._magnitudes.items()]
+
+
+_missing = object()
+
+
+class SchemaRecord(CompactRecord):
+    """Base class for record types created by :func:`schema`.
+
+    Values for the schema fields are stored by position in a list, with
+    quantities stored as magnitudes.  Keys that aren't part of the schema,
+    and values assigned to quantity fields that aren't quantities in the
+    field units, are stored in a dict that is only allocated when needed.
+
+    Parameters
+    ----------
+    values: list, required
+        Magnitudes of the schema fields, in schema order.  The list is
+        stored, not copied.
+    """
+    __slots__ = ["_values", "_extra"]
+    fields = ()
+    """Keys of the schema fields, in order."""
+    units = ()
+    """Units of the schema fields, in order, with `None` for fields that aren't quantities."""
+    _positions = {}
+
+    def __init__(self, values):
+        self._values = values
+        self._extra = None
+
+    def __getitem__(self, key):
+        position = self._positions.get(key)
+        if position is not None:
+            value = self._values[position]
+            if value is not _missing:
+                units = self.units[position]
+                return value if units is None else pipecat.quantity(value, units)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        position = self._positions.get(key)
+        if position is not None:
+            units = self.units[position]
+            if units is None or (isinstance(value, pipecat.quantity) and value.units == units):
+                self._values[position] = value if units is None else value.magnitude
+                # The field may have been moved out of the schema by an earlier assignment.
+                if self._extra is not None:
+                    self._extra.pop(key, None)
+                return
+            self._values[position] = _missing
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        position = self._positions.get(key)
+        if position is not None and self._values[position] is not _missing:
+            self._values[position] = _missing
+            return
+        if self._extra is None:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __iter__(self):
+        for key, value in zip(self.fields, self._values):
+            if value is not _missing:
+                yield key
+        if self._extra is not None:
+            for key in self._extra:
+                yield key
+
+    def __len__(self):
+        return sum(1 for value in self._values if value is not _missing) + (0 if self._extra is None else len(self._extra))
+
+    def __contains__(self, key):
+        position = self._positions.get(key)
+        if position is not None and self._values[position] is not _missing:
+            return True
+        return self._extra is not None and key in self._extra
+
+    def copy(self):
+        """Return a shallow copy of the record."""
+        result = type(self)(list(self._values))
+        if self._extra is not None:
+            result._extra = dict(self._extra) # pylint: disable=protected-access
+        return result
+
+    def magnitude(self, key):
+        position = self._positions.get(key)
+        if position is not None:
+            value = self._values[position]
+            if value is not _missing:
+                return value, self.units[position]
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key], None
+
+    def magnitudes(self):
+        fields = [(key, value, units) for key, value, units in zip(self.fields, self._values, self.units) if value is not _missing]
+        if self._extra is not None:
+            fields += [(key, value, None) for key, value in self._extra.items()]
+        return fields
+
+    def positional(self):
+        """Return the record contents by position.
+
+        Returns
+        -------
+        contents: tuple or `None`
+            A list of magnitudes for every schema field, in schema order, and a
+            list of (key, value) pairs for any other fields, or `None` if some of
+            the schema fields have been removed.
+        """
+        if any(value is _missing for value in self._values):
+            return None
+        return self._values, [] if self._extra is None else list(self._extra.items())
+
+
+def schema(name, fields):
+    """Create a record type for records that always contain the same fields.
+
+    Device parsers that produce records with a fixed set of keys can use the
+    resulting type instead of dicts, storing their values by position
+    instead of by key.  The records use much less memory than dicts, only
+    create quantities when a field is read, and can be stored in a
+    :class:`pipecat.store.Table` by position.  Records are created from a
+    list containing the magnitude of each field, in order.
+
+    Examples
+    --------
+
+    >>> Position = pipecat.record.schema("Position", [("latitude", pipecat.units.degrees), ("longitude", pipecat.units.degrees), ("name", None)])
+    >>> record = Position([35.1, -106.6, "Albuquerque"])
+    >>> record["latitude"]
+    <Quantity(35.1, 'degree')>
+
+    Parameters
+    ----------
+    name: string, required
+        Name of the record type.
+    fields: sequence of (key, units) tuples, required
+        :ref:`Record keys <record-keys>` and their units, or `None` for fields
+        that don't contain quantities.
+
+    Returns
+    -------
+    type: subclass of :class:`SchemaRecord`
+    """
+    fields = list(fields)
+    keys = tuple(key for key, units in fields)
+    if len(set(keys)) != len(keys):
+        raise ValueError("Schema fields must have unique keys.")
+    return type(str(name), (SchemaRecord,), {
+        "__slots__": [],
+        "fields": keys,
+        "units": tuple(units for key, units in fields),
+        "_positions": dict((key, position) for position, key in enumerate(keys)),
+        })
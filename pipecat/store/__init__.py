@@ -20,15 +20,700 @@
 
 from __future__ import absolute_import, division, print_function
 
+import bisect
 import collections
+import hashlib
+import io
+import os
+import re
+import tempfile
+import time
+import zlib
 
+import arrow
 import numpy
 import six
 
 import pipecat
+import pipecat.record
+
+class _Column(object):
+    """Typed, growable storage for a single :class:`Table` column.
+
+    Values are stored in a numpy buffer whose capacity doubles as needed, so
+    appends are amortized O(1).  Quantities are stored as magnitudes, with
+    their units stored once for the entire column.
+
+    Values can be discarded from the front of the column in O(1) time.  The
+    live values always occupy a contiguous region of the buffer, which is
+    compacted into a new buffer when it reaches the end of the buffer, so a
+    column with a bounded number of rows never grows beyond twice that size.
+    Existing values are never overwritten, so views returned by
+    :meth:`values` keep their contents after later appends and discards.
+
+    Rows without a value are recorded in a validity buffer that is only
+    allocated once the first missing value is added, so dense columns don't
+    pay for it.
+
+    If `max_categories` is specified, columns of strings are dictionary
+    encoded: the buffer stores small integer codes, and `categories` stores
+    the distinct strings they represent.  Once a column contains more than
+    `max_categories` distinct strings (or a value that isn't a string), it
+    falls back to storing the strings themselves.
+
+    The `version` attribute is incremented whenever the column contents
+    change, so callers can cache derived data.  The `appended` and
+    `discarded` attributes count every row ever appended and discarded, so
+    callers can update derived data incrementally.
+
+    Buffers are created by `allocator`, a callable that takes a capacity and
+    numpy type and returns an array, so storage can be moved out of memory
+    (see :class:`_MemoryMapAllocator`).
+    """
+    def __init__(self, value, capacity=16, limit=None, allocator=None, max_categories=None):
+        if limit is not None:
+            capacity = min(capacity, 2 * limit)
+        self.units = value.units if isinstance(value, pipecat.quantity) else None
+        self.categories = None
+        self._max_categories = max_categories
+        dtype = _dtype(_magnitude(value, self.units))
+        if max_categories and isinstance(value, six.string_types):
+            self.categories = []
+            self._codes = {}
+            dtype = numpy.min_scalar_type(max_categories - 1)
+        self._allocator = allocator if allocator is not None else numpy.empty
+        self._buffer = self._allocator(max(1, capacity), dtype)
+        self._valid = None
+        self._begin = 0
+        self._size = 0
+        self._missing = 0
+        self._limit = limit
+        self.appended = 0
+        self.discarded = 0
+        self.version = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dtype(self):
+        return self._buffer.dtype
+
+    @property
+    def itemsize(self):
+        return self._buffer.itemsize
+
+    @property
+    def missing(self):
+        """Number of rows without a value."""
+        return self._missing
+
+    @property
+    def nbytes(self):
+        return self._buffer.nbytes + (0 if self._valid is None else self._valid.nbytes)
+
+    def append(self, value):
+        if self.categories is not None:
+            value = self._encode(value)
+        if self.categories is None and self._buffer.dtype != object:
+            if (self.units is None) != (not isinstance(value, pipecat.quantity)):
+                self._promote(numpy.dtype(object))
+            else:
+                dtype = _dtype(_magnitude(value, self.units))
+                if dtype != self._buffer.dtype:
+                    self._promote(_promote_types(self._buffer.dtype, dtype))
+        self._push(_magnitude(value, self.units))
+
+    def append_magnitude(self, magnitude):
+        """Append the magnitude of a quantity that is already in the column units."""
+        if self._buffer.dtype != object:
+            dtype = _dtype(magnitude)
+            if dtype != self._buffer.dtype:
+                self._promote(_promote_types(self._buffer.dtype, dtype))
+        self._push(magnitude)
+
+    def _push(self, value):
+        self._grow(1)
+        self._buffer[self._begin + self._size] = value
+        if self._valid is not None:
+            self._valid[self._begin + self._size] = True
+        self._size += 1
+        self.appended += 1
+        self.version += 1
+
+    def extend(self, values, mask=None):
+        """Append an array of values in the form they are stored, with an optional mask of rows without values."""
+        values = numpy.asarray(values)
+        if self._buffer.dtype != object and values.dtype != self._buffer.dtype:
+            self._promote(_promote_types(self._buffer.dtype, values.dtype))
+        count = len(values)
+        self._grow(count)
+        end = self._begin + self._size
+        self._buffer[end:end + count] = values
+        if mask is not None and numpy.any(mask):
+            self._allocate_valid()
+            self._missing += int(numpy.count_nonzero(mask))
+        if self._valid is not None:
+            self._valid[end:end + count] = True if mask is None else ~numpy.asarray(mask, dtype=bool)
+        self._size += count
+        self.appended += count
+        self.version += 1
+
+    def extend_codes(self, codes, categories, mask=None):
+        """Append dictionary encoded strings, given their codes and categories."""
+        lookup = [self._encode(category) for category in categories]
+        if self.categories is not None:
+            self.extend(numpy.array(lookup, dtype=self.dtype)[codes], mask)
+        else:
+            strings = numpy.empty(len(categories), dtype=object)
+            strings[:] = categories
+            self.extend(strings[codes], mask)
+
+    def pad(self, count):
+        """Append `count` rows without values."""
+        if count <= 0:
+            return
+        self._allocate_valid()
+        self._grow(count)
+        end = self._begin + self._size
+        self._buffer[end:end + count] = None if self._buffer.dtype == object else numpy.zeros(1, dtype=self._buffer.dtype)
+        self._valid[end:end + count] = False
+        self._size += count
+        self._missing += count
+        self.appended += count
+        self.version += 1
+
+    def discard(self, count):
+        """Remove `count` values from the front of the column."""
+        count = min(count, self._size)
+        if self._missing:
+            self._missing -= count - numpy.count_nonzero(self._valid[self._begin:self._begin + count])
+        self._begin += count
+        self._size -= count
+        self.discarded += count
+        self.version += 1
+
+    def convert(self, scale, offset, units):
+        """Convert the values to new units, given the scale and offset of the conversion."""
+        # Convert a new copy of the values, since callers may hold views of the current buffer.
+        self._move(len(self._buffer), self._buffer.dtype if self._buffer.dtype.kind in "fc" else numpy.dtype(numpy.float64))
+        values = self._buffer[:self._size]
+        numpy.multiply(values, scale, out=values)
+        if offset:
+            numpy.add(values, offset, out=values)
+        self.units = units
+        self.version += 1
+
+    def code(self, value):
+        """Return the code for a category, or `None` if the column doesn't contain it."""
+        return self._codes.get(value)
+
+    def has_value(self, index):
+        """Return True if a row contains a value."""
+        return self._valid is None or bool(self._valid[self._begin + index])
+
+    def mask(self):
+        """Return a view of the rows without values, or `None` if every row has a value."""
+        if not self._missing:
+            return None
+        return ~self._valid[self._begin:self._begin + self._size]
+
+    def value(self, index):
+        return self._buffer[self._begin + index]
+
+    def values(self):
+        return self._buffer[self._begin:self._begin + self._size]
+
+    def reallocate(self, allocator):
+        """Move the column contents into buffers created by a new allocator."""
+        self._allocator = allocator
+        self._move(len(self._buffer), self._buffer.dtype)
+        self.version += 1
+
+    def _allocate_valid(self):
+        """Start tracking which rows contain values."""
+        if self._valid is None:
+            self._valid = self._allocator(len(self._buffer), bool)
+            self._valid[self._begin:self._begin + self._size] = True
+
+    def _encode(self, value):
+        """Return the code for a string, falling back to storing strings if necessary."""
+        if isinstance(value, six.string_types):
+            code = self._codes.get(value)
+            if code is not None:
+                return code
+            if len(self.categories) < self._max_categories:
+                self._codes[value] = len(self.categories)
+                self.categories.append(value)
+                return self._codes[value]
+
+        categories = numpy.empty(len(self.categories), dtype=object)
+        categories[:] = self.categories
+        values = categories[self.values()]
+        self.categories = None
+        self._codes = None
+        self._move(len(self._buffer), numpy.dtype(object))
+        self._buffer[:self._size] = values
+        return value
+
+    def _grow(self, count):
+        """Ensure there is room to append `count` values."""
+        if self._begin + self._size + count <= len(self._buffer):
+            return
+        capacity = len(self._buffer)
+        if self._size + count > capacity // 2 or self._begin == 0:
+            capacity = max(2 * capacity, self._size + count)
+            if self._limit is not None:
+                capacity = max(self._size + count, min(capacity, 2 * self._limit))
+        self._move(capacity, self._buffer.dtype)
+
+    def _promote(self, dtype):
+        """Convert existing values to a more general type."""
+        quantities = None
+        if self.units is not None and dtype == object:
+            quantities = numpy.empty(self._size, dtype=object)
+            for index, value in enumerate(self.values()):
+                quantities[index] = pipecat.quantity(value, self.units)
+            self.units = None
+        self._move(len(self._buffer), dtype)
+        if quantities is not None:
+            self._buffer[:self._size] = quantities
+
+    def _move(self, capacity, dtype):
+        """Move the live values to the front of a new buffer."""
+        def move(buffer, dtype):
+            # Always allocate, so views of the old buffer aren't overwritten.
+            result = self._allocator(capacity, dtype)
+            result[:self._size] = buffer[self._begin:self._begin + self._size]
+            return result
+
+        self._buffer = move(self._buffer, dtype)
+        if self._buffer.dtype == object:
+            self._buffer[self._size:] = None
+        if self._valid is not None:
+            self._valid = move(self._valid, self._valid.dtype)
+        self._begin = 0
+
+
+class _CompressedColumn(object):
+    """Stores a numeric :class:`Table` column in compressed blocks.
+
+    New values are appended to an uncompressed :class:`_Column`.  Each time
+    it fills up, its contents are compressed into a block (see
+    :func:`_compress_block`) and it is emptied.  Reading the column
+    decompresses every block, while reading individual values only
+    decompresses the block that contains them.  If the column receives a
+    value that isn't a number, it is decompressed and stored normally from
+    then on.  Implements the same interface as :class:`_Column`.
+
+    Running totals of the rows, missing values, and bytes in the blocks are
+    kept as blocks are added and discarded, along with the position of the
+    first row in each block, so that the column size is available in O(1)
+    time and individual rows can be located using a binary search.
+    """
+    def __init__(self, value, block_size=1024, allocator=None):
+        self._tail = _Column(value, capacity=block_size, allocator=allocator)
+        self._block_size = block_size
+        self._blocks = collections.deque()
+        self._starts = []
+        self._head = 0
+        self._end = 0
+        self._rows = 0
+        self._missing = 0
+        self._nbytes = 0
+        self._skip = 0
+        self._decompressed = None
+        self.categories = None
+        self.version = 0
+
+    def __len__(self):
+        return self._rows - self._skip + len(self._tail)
+
+    @property
+    def dtype(self):
+        return self._tail.dtype
+
+    @property
+    def itemsize(self):
+        if not len(self):
+            return self._tail.itemsize
+        return self.nbytes / len(self)
+
+    @property
+    def missing(self):
+        return self._missing + self._tail.missing
+
+    @property
+    def nbytes(self):
+        return self._nbytes + self._tail.nbytes
+
+    @property
+    def units(self):
+        return self._tail.units
+
+    def append(self, value):
+        units = self._tail.units
+        if self._block_size is not None:
+            if (units is None) != (not isinstance(value, pipecat.quantity)) or _dtype(_magnitude(value, units)).kind not in "biufcM":
+                self._decompress(value)
+        self._tail.append(value)
+        self._flush()
+        self.version += 1
+
+    def append_magnitude(self, magnitude):
+        if self._block_size is not None and _dtype(magnitude).kind not in "biufcM":
+            self.append(pipecat.quantity(magnitude, self.units))
+            return
+        self._tail.append_magnitude(magnitude)
+        self._flush()
+        self.version += 1
+
+    def extend(self, values, mask=None):
+        if self._block_size is not None and values.dtype.kind not in "biufcM":
+            self._decompress(values[0])
+        begin = 0
+        while begin < len(values):
+            end = len(values) if self._block_size is None else begin + min(len(values) - begin, self._block_size - len(self._tail))
+            self._tail.extend(values[begin:end], None if mask is None else mask[begin:end])
+            self._flush()
+            begin = end
+        self.version += 1
+
+    def convert(self, scale, offset, units):
+        self._tail.convert(scale, offset, units)
+        blocks = collections.deque()
+        for count, values, valid, missing in self._blocks:
+            values = _decompress_block(values, count).astype(self._tail.dtype) * scale + offset
+            blocks.append((count, _compress_block(values), valid, missing))
+        self._blocks = blocks
+        self._nbytes = sum(_block_nbytes(block) for block in blocks)
+        self._decompressed = None
+        self.version += 1
+
+    def discard(self, count):
+        self._skip += count
+        while self._blocks and self._skip >= self._blocks[0][0]:
+            block = self._blocks.popleft()
+            self._skip -= block[0]
+            self._rows -= block[0]
+            self._missing -= block[3]
+            self._nbytes -= _block_nbytes(block)
+            self._head += 1
+            self._decompressed = None
+        if self._head > 64 and 2 * self._head > len(self._starts):
+            del self._starts[:self._head]
+            self._head = 0
+        if not self._blocks:
+            self._tail.discard(self._skip)
+            self._skip = 0
+        self.version += 1
+
+    def has_value(self, index):
+        block, index = self._locate(index)
+        if block is None:
+            return self._tail.has_value(index)
+        valid = self._block(block)[1]
+        return valid is None or bool(valid[index])
+
+    def mask(self):
+        if not self.missing:
+            return None
+        masks = [numpy.zeros(block[0], dtype=bool) if block[2] is None else ~self._block(index)[1] for index, block in enumerate(self._blocks)]
+        masks.append(numpy.zeros(len(self._tail), dtype=bool) if self._tail.mask() is None else self._tail.mask())
+        return numpy.concatenate(masks)[self._skip:]
+
+    def pad(self, count):
+        while count > 0:
+            padding = count if self._block_size is None else min(count, self._block_size - len(self._tail))
+            self._tail.pad(padding)
+            self._flush()
+            count -= padding
+        self.version += 1
+
+    def reallocate(self, allocator):
+        self._tail.reallocate(allocator)
+
+    def value(self, index):
+        block, index = self._locate(index)
+        if block is None:
+            return self._tail.value(index)
+        return self._block(block)[0][index]
+
+    def values(self):
+        values = [self._block(index)[0] for index in range(len(self._blocks))]
+        values.append(self._tail.values())
+        return numpy.concatenate(values)[self._skip:]
+
+    def _block(self, index):
+        """Return the decompressed values and validity for a block."""
+        if self._decompressed is None or self._decompressed[0] is not self._blocks[index]:
+            count, values, valid, _ = self._blocks[index]
+            values = _decompress_block(values, count).astype(self._tail.dtype, copy=False)
+            if valid is not None:
+                valid = numpy.unpackbits(numpy.frombuffer(zlib.decompress(valid), dtype=numpy.uint8))[:count].astype(bool)
+            self._decompressed = (self._blocks[index], values, valid)
+        return self._decompressed[1:]
+
+    def _decompress(self, value):
+        """Switch to storing values without compression."""
+        values = self.values()
+        mask = self.mask()
+        seed = value if not len(values) else values[0] if self._tail.units is None else pipecat.quantity(values[0], self._tail.units)
+        self._tail = _Column(seed, capacity=max(16, len(values)), allocator=self._tail._allocator)
+        self._tail.extend(values, mask)
+        self._block_size = None
+        self._blocks.clear()
+        del self._starts[:]
+        self._head = 0
+        self._end = 0
+        self._rows = 0
+        self._missing = 0
+        self._nbytes = 0
+        self._skip = 0
+        self._decompressed = None
+
+    def _flush(self):
+        """Compress the uncompressed values once there are enough of them."""
+        if self._block_size is None or len(self._tail) < self._block_size:
+            return
+        values = self._tail.values()
+        mask = self._tail.mask()
+        valid = None if mask is None else zlib.compress(numpy.packbits(~mask).tobytes())
+        missing = 0 if mask is None else int(numpy.count_nonzero(mask))
+        block = (len(values), _compress_block(values), valid, missing)
+        self._blocks.append(block)
+        self._starts.append(self._end)
+        self._end += block[0]
+        self._rows += block[0]
+        self._missing += missing
+        self._nbytes += _block_nbytes(block)
+        self._tail.discard(len(self._tail))
+
+    def _locate(self, index):
+        """Return the block and offset containing a row, or `None` and the offset within the uncompressed values."""
+        if not self._blocks:
+            return None, index
+        # Block starts are positions in every row ever compressed, including discarded blocks.
+        index += self._starts[self._head] + self._skip
+        if index >= self._end:
+            return None, index - self._end
+        block = bisect.bisect_right(self._starts, index, self._head) - 1
+        return block - self._head, index - self._starts[block]
+
+
+def _block_nbytes(block):
+    """Return the number of bytes used by a compressed block."""
+    return len(block[1][1]) + len(block[2] or b"")
+
+
+def _compress_block(values):
+    """Compress an array of numbers.
+
+    Each value is transformed so that slowly-changing series contain mostly
+    zero bits - floating point values are XORed with their predecessor, and
+    integers and timestamps are replaced with the difference from their
+    predecessor.  The bytes are then regrouped so that the bytes with the same
+    significance are adjacent, before compressing them with :mod:`zlib`.
+    """
+    dtype = values.dtype
+    bits = numpy.ascontiguousarray(values).view("u%s" % dtype.itemsize)
+    previous = numpy.zeros_like(bits)
+    previous[1:] = bits[:-1]
+    bits = bits ^ previous if dtype.kind == "f" else bits - previous
+    data = bits.view(numpy.uint8).reshape(-1, dtype.itemsize).T.tobytes()
+    return (dtype.str, zlib.compress(data))
+
+
+def _decompress_block(block, count):
+    """Reverse the transformation applied by :func:`_compress_block`."""
+    stored, data = block
+    stored = numpy.dtype(stored)
+    bits = numpy.frombuffer(zlib.decompress(data), dtype=numpy.uint8).reshape(stored.itemsize, count).T.copy().view("u%s" % stored.itemsize).ravel()
+    if stored.kind == "f":
+        bits = numpy.bitwise_xor.accumulate(bits)
+    else:
+        bits = numpy.cumsum(bits, dtype=bits.dtype)
+    return bits.view(stored)
+
+
+class _MemoryMapAllocator(object):
+    """Allocates column buffers as memory-mapped files in a directory.
+
+    Each buffer is backed by its own file, which is unlinked as soon as it
+    has been mapped (where the platform allows it), so the operating system
+    reclaims the disk space once the buffer is no longer referenced.  Python
+    objects can't be mapped, so columns of objects are kept in memory.
+    """
+    def __init__(self, directory=None):
+        self._directory = directory
+
+    def __call__(self, capacity, dtype):
+        dtype = numpy.dtype(dtype)
+        if dtype.hasobject:
+            return numpy.empty(capacity, dtype=dtype)
+
+        handle, path = tempfile.mkstemp(prefix="pipecat-", suffix=".column", dir=self._directory)
+        try:
+            os.ftruncate(handle, capacity * dtype.itemsize)
+            buffer = numpy.memmap(path, dtype=dtype, mode="r+", shape=(capacity,))
+        finally:
+            os.close(handle)
+        try:
+            os.unlink(path)
+        except OSError: # pragma: no cover
+            pass
+        return buffer
+
+
+def _dtype(value):
+    """Return the numpy type used to store a value."""
+    value = numpy.asarray(value)
+    if value.ndim == 0 and value.dtype.kind in "biufcM":
+        return value.dtype
+    return numpy.dtype(object)
+
+
+def _promote_types(a, b):
+    """Return a numpy type that can store values of either type."""
+    try:
+        dtype = numpy.promote_types(a, b)
+    except TypeError:
+        return numpy.dtype(object)
+    return dtype if dtype.kind in "biufcM" else numpy.dtype(object)
+
+
+def _column_name(key, delimiter):
+    """Convert a record key into a flat column name."""
+    return delimiter.join(key) if isinstance(key, tuple) else key
+
+
+def _datetime64(value):
+    """Convert a timestamp into the form stored in table columns."""
+    if isinstance(value, numpy.datetime64):
+        return value.astype("datetime64[us]")
+    if not isinstance(value, arrow.Arrow):
+        value = arrow.get(value)
+    return numpy.datetime64(value.to("UTC").naive, "us")
+
+
+def _arrow_timestamps(column):
+    """Return True if every value stored in a column is an :class:`arrow.arrow.Arrow` timestamp."""
+    values = column.values()
+    mask = column.mask()
+    if mask is not None:
+        values = values[~mask]
+    return column.dtype == object and len(values) > 0 and all(isinstance(value, arrow.Arrow) for value in values)
+
+
+def _isnat(values):
+    """Return True where `datetime64` values are NaT (without :func:`numpy.isnat`, which requires numpy 1.13)."""
+    return numpy.asarray(values).view(numpy.int64) == numpy.iinfo(numpy.int64).min
+
+
+def _magnitude(value, units):
+    """Return the raw value that will be stored in a column."""
+    if units is not None and isinstance(value, pipecat.quantity):
+        return value.to(units).magnitude if value.units != units else value.magnitude
+    return value
+
 
 class Table(object):
-    def __init__(self):
+    """Column-oriented storage for records.
+
+    Each column is stored in a typed numpy buffer, with the units for
+    quantities stored once per column.  Column access returns a view of the
+    underlying buffer instead of a copy, so callers should not modify the
+    results.  Column results are cached until the next call to :meth:`append`
+    modifies the column, so repeated lookups are cheap.  Timestamps are stored
+    as :class:`arrow.arrow.Arrow` instances unless `datetime64` is used to
+    store them more compactly as UTC `datetime64` values.
+
+    Every call to :meth:`append` adds one row to every column, so records
+    with different sets of keys (such as the output of
+    :func:`pipecat.connect.multiplex`) can be stored in a single table.
+    Columns with rows that lack a value are returned as
+    :class:`numpy.ma.MaskedArray` instances, with the missing rows masked.
+
+    Columns of strings with few distinct values, such as modes and
+    identifiers, are dictionary encoded, storing a small integer code per
+    row.  Use :meth:`where` to select rows using the codes directly.
+
+    Records that store magnitudes, such as :class:`pipecat.record.LazyRecord`
+    and record types created with :func:`pipecat.record.schema`, are
+    appended without creating quantities.  Schema records are appended by
+    position, without looking up their keys.
+
+    Use :meth:`between` and :meth:`asof` to query rows by timestamp.  These
+    use a binary search of the `timestamp` column, and return views of the
+    table storage as long as every record has a timestamp, and timestamps are
+    appended in increasing order.  :class:`arrow.arrow.Arrow` timestamps are
+    converted to `datetime64` values as they are appended and kept alongside
+    the column, which costs another eight bytes per row - store the
+    timestamps as `datetime64` values (see `datetime64` below) to avoid it.
+
+    By default a table grows without bound.  Use the optional retention
+    parameters to keep only the most recent window of records - older rows
+    are discarded as new records are appended, so memory use stays flat.
+
+    Parameters
+    ----------
+    max_rows: int, optional
+        Maximum number of rows to retain.
+    max_age: time quantity, optional
+        Discard rows whose `timestamp` is older than this, relative to the
+        most recent timestamp.  Assumes that timestamps are appended in
+        increasing order, as with :func:`pipecat.utility.add_timestamp`.
+        Rows without a timestamp are discarded along with the row before
+        them.
+    max_bytes: int, optional
+        Maximum number of bytes of column data to retain.  Values stored as
+        Python objects (such as strings) only count the size of a reference.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing timestamps, used with `max_age`, :meth:`between`, and
+        :meth:`asof`.
+    spill_threshold: int, optional
+        Once column data exceeds this many bytes, move it into memory-mapped
+        files so that large tables don't need to be held in memory.
+        Columns of Python objects (such as strings) are not moved.
+    spill_directory: string, optional
+        Directory where memory-mapped files will be created.  Defaults to
+        the system temporary directory.
+    max_categories: int, optional
+        Maximum number of distinct strings in a dictionary encoded column.
+        Columns with more distinct strings store the strings instead.  Use
+        `None` to disable dictionary encoding.
+    compressed: sequence of :ref:`Record keys <record-keys>`, or `True`, optional
+        Columns to store in compressed blocks, or `True` to compress every
+        column of floating point values and timestamps.  This greatly reduces
+        the memory used by slowly-changing sensor data, at the cost of
+        decompressing the column each time it's accessed.
+    datetime64: sequence of :ref:`Record keys <record-keys>`, or `True`, optional
+        Columns whose :class:`arrow.arrow.Arrow` timestamps will be stored as
+        UTC `datetime64` values, or `True` to convert the timestamps in every
+        column.  Values in these columns are returned as `datetime64` values
+        instead of :class:`arrow.arrow.Arrow` instances.
+    """
+    def __init__(
+        self,
+        max_rows=None,
+        max_age=None,
+        max_bytes=None,
+        timestamp="timestamp",
+        spill_threshold=None,
+        spill_directory=None,
+        max_categories=256,
+        compressed=None,
+        datetime64=None,
+        ):
+        self._max_rows = max_rows
+        self._max_age = None if max_age is None else numpy.timedelta64(int(max_age.to(pipecat.units.microseconds).magnitude), "us")
+        self._max_bytes = max_bytes
+        self._timestamp = timestamp
+        self._spill_threshold = spill_threshold
+        self._spill_directory = spill_directory
+        self._max_categories = max_categories
+        self._compressed = compressed
+        self._datetime64 = datetime64
         self.reset()
 
     def __len__(self):
@@ -37,37 +722,500 @@ class Table(object):
         return 0
 
     def __getitem__(self, key):
-        values = self._columns[key]
-        if isinstance(values[0], pipecat.quantity):
-            values = pipecat.quantity(numpy.array([value.magnitude for value in values]), values[0].units)
+        column = self._columns[key]
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == column.version:
+            return cached[1]
+
+        decoded = None
+        if column.categories is None:
+            values = column.values()
         else:
-            values = numpy.array(values)
+            # The decoded strings are kept with the cached result, and updated the next time the column changes.
+            decoded = self._decode(column, None if cached is None else cached[2])
+            values = decoded[1].values()
+        mask = column.mask()
+        if mask is not None:
+            values = numpy.ma.masked_array(values, mask=mask)
+        if column.units is not None:
+            values = pipecat.quantity(values, column.units)
+        self._cache[key] = (column.version, values, decoded)
         return values
 
     def append(self, record):
-        for key, value in record.items():
-            if key not in self._columns:
-                self._columns[key] = []
-            self._columns[key].append(value)
+        rows = len(self)
+        contents = record.positional() if isinstance(record, pipecat.record.SchemaRecord) else None
+        positions = None if contents is None else self._positions(type(record))
+        if positions is not None:
+            # Schema fields are appended by position, without looking up keys.
+            for (column, direct, converted), value, units in zip(positions, contents[0], record.units):
+                if units is None:
+                    column.append(_datetime64(value) if converted and isinstance(value, arrow.Arrow) else value)
+                elif direct and column.dtype != object:
+                    column.append_magnitude(value)
+                else:
+                    column.append(pipecat.quantity(value, units))
+            fields = [(key, value, None) for key, value in contents[1]]
+        elif isinstance(record, pipecat.record.CompactRecord):
+            fields = record.magnitudes()
+        else:
+            fields = [(key, value, None) for key, value in record.items()]
+        for key, value, units in fields:
+            column = self._columns.get(key)
+            if units is not None:
+                # Magnitudes from compact records are stored directly when their units match the column.
+                if column is not None and column.dtype != object and units == column.units:
+                    column.append_magnitude(value)
+                    continue
+                value = record[key]
+            elif self._datetime64 is not None and isinstance(value, arrow.Arrow) and self._converted(key):
+                value = _datetime64(value)
+            if column is None:
+                column = self._columns[key] = self._create_column(key, value)
+                column.pad(rows)
+            column.append(value)
+        if len(record) != len(self._columns):
+            for column in self._columns.values():
+                if len(column) == rows:
+                    column.pad(1)
+
+        if self._timestamp in record:
+            column = self._columns[self._timestamp]
+            timestamp = column.value(len(column) - 1)
+            if isinstance(timestamp, arrow.Arrow):
+                timestamp = _datetime64(timestamp)
+            if self._latest is not None and timestamp < self._latest:
+                self._sorted = False
+            else:
+                self._latest = timestamp
+
+        self._index_timestamps()
+        self._retain()
+        if self._allocator is None and self._spill_threshold is not None and self.nbytes > self._spill_threshold:
+            self._spill()
+
+    def asof(self, time):
+        """Return the most recent record at or before a given time.
+
+        Parameters
+        ----------
+        time: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, required
+
+        Returns
+        -------
+        record: dict
+            Record containing the values from the matching row, or `None` if
+            every row is newer than `time`.
+        """
+        timestamps, order = self._timestamps()
+        index = numpy.searchsorted(timestamps, _datetime64(time), side="right") - 1
+        if index < 0:
+            return None
+        row = index if order is None else order[index]
+        return dict((key, self[key][row]) for key, column in self._columns.items() if column.has_value(row))
+
+    def between(self, start=None, stop=None):
+        """Return the rows within a range of times.
+
+        Parameters
+        ----------
+        start: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+            Beginning of the range (inclusive).  Defaults to the oldest row.
+        stop: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+            End of the range (exclusive).  Defaults to the newest row.
+
+        Returns
+        -------
+        columns: :class:`collections.OrderedDict`
+            Maps each table key to the column values in the range.  If the
+            table timestamps are in increasing order the values are views of
+            the table storage, otherwise they are copies.
+        """
+        timestamps, order = self._timestamps()
+        begin = 0 if start is None else numpy.searchsorted(timestamps, _datetime64(start), side="left")
+        end = len(timestamps) if stop is None else numpy.searchsorted(timestamps, _datetime64(stop), side="left")
+        rows = slice(begin, end) if order is None else order[begin:end]
+        return collections.OrderedDict((key, self[key][rows]) for key in self._columns)
+
+    def convert(self, units):
+        """Convert columns of quantities to other units, in place.
+
+        Each column is converted using a single numpy operation on its
+        storage, and quantities appended later are converted to the new
+        units as they are stored.  Use :func:`pipecat.utility.convert_units`
+        to convert records before they are stored instead.
+
+        Parameters
+        ----------
+        units: dict, required
+            Maps :ref:`Record keys <record-keys>` to the units their columns
+            will be converted to.  Units may be specified as strings.
+
+        Raises
+        ------
+        KeyError
+            If the table doesn't contain one of the keys.
+        ValueError
+            If a column doesn't contain quantities, or the conversion isn't
+            affine (such as logarithmic units).
+        """
+        for key, target in units.items():
+            column = self._columns[key]
+            if column.units is None:
+                raise ValueError("Column %s doesn't contain quantities." % (key,))
+            if isinstance(target, six.string_types):
+                target = pipecat.units.parse_units(target)
+            conversion = pipecat._conversion(column.units, target) # pylint: disable=protected-access
+            if conversion is None:
+                raise ValueError("Column %s can't be converted from %s to %s using a scale and offset." % (key, column.units, target))
+            column.convert(conversion[0], conversion[1], target)
+        # Cached column positions record whether units match.
+        self._schemas = {}
+
+    @property
+    def nbytes(self):
+        """Total number of bytes allocated to store column data, including strings decoded from dictionary encoded columns."""
+        total = sum(column.nbytes for column in self._columns.values()) + (0 if self._times is None else self._times.nbytes)
+        return total + sum(cached[2][1].nbytes for cached in self._cache.values() if cached[2] is not None)
+
+    def to_arrow(self, delimiter="/"):
+        """Return the table contents as an Arrow table.
+
+        This method requires `pyarrow <https://arrow.apache.org/docs/python>`_.
+        Numeric and timestamp columns share memory with the table instead of
+        being copied, and dictionary encoded columns are returned as Arrow
+        dictionary arrays.  Rows without values become nulls.
+
+        Parameters
+        ----------
+        delimiter: string, optional
+            Used to join :ref:`hierarchical keys <record-keys>` into column
+            names.
+
+        Returns
+        -------
+        table: :class:`pyarrow.Table`
+            Arrow table with one column per key.  The units for quantities are
+            stored in the "units" metadata of each field.
+        """
+        import pyarrow # pylint: disable=import-error
+
+        arrays = []
+        fields = []
+        for key, column in self._columns.items():
+            mask = column.mask()
+            if column.categories is not None:
+                array = pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(column.values(), mask=mask),
+                    pyarrow.array(column.categories, type=pyarrow.string()),
+                    )
+            elif column.dtype == object:
+                values = [value.datetime if isinstance(value, arrow.Arrow) else value for value in column.values()]
+                array = pyarrow.array(values, mask=mask, from_pandas=True)
+            else:
+                array = pyarrow.array(column.values(), mask=mask)
+            metadata = None if column.units is None else {"units": str(column.units)}
+            arrays.append(array)
+            fields.append(pyarrow.field(_column_name(key, delimiter), array.type, metadata=metadata))
+        return pyarrow.Table.from_arrays(arrays, schema=pyarrow.schema(fields))
+
+    def to_pandas(self, delimiter="/"):
+        """Return the table contents as a pandas data frame.
+
+        This method requires `pandas <http://pandas.pydata.org>`_.  Numeric
+        and timestamp columns share memory with the table where pandas allows
+        it, and dictionary encoded columns are returned as categoricals.
+        Columns of :class:`arrow.arrow.Arrow` timestamps are converted to UTC
+        `datetime64` values.  Rows without values become missing values
+        (which means copying the column).
+
+        Parameters
+        ----------
+        delimiter: string, optional
+            Used to join :ref:`hierarchical keys <record-keys>` into column
+            names.
+
+        Returns
+        -------
+        frame: :class:`pandas.DataFrame`
+            Data frame with one column per key.  The units for quantities are
+            stored in the frame's `attrs["units"]` dict, indexed by column
+            name.  Older versions of pandas (before 1.0) don't support
+            `attrs`, so the units are omitted.
+        """
+        import pandas # pylint: disable=import-error
+
+        columns = collections.OrderedDict()
+        units = {}
+        for key, column in self._columns.items():
+            name = _column_name(key, delimiter)
+            mask = column.mask()
+            if column.categories is not None:
+                codes = column.values().astype(numpy.int64 if mask is not None else column.dtype, copy=False)
+                if mask is not None:
+                    codes[mask] = -1
+                values = pandas.Categorical.from_codes(codes, column.categories)
+            elif _arrow_timestamps(column):
+                values = self._times.values() if key == self._timestamp else numpy.array(
+                    [numpy.datetime64("NaT") if value is None else _datetime64(value) for value in column.values()],
+                    dtype="datetime64[us]",
+                    )
+            else:
+                values = self[key]
+                if column.units is not None:
+                    values = values.magnitude
+            columns[name] = values
+            if column.units is not None:
+                units[name] = str(column.units)
+
+        frame = pandas.DataFrame(columns, copy=False)
+        if hasattr(frame, "attrs"):
+            frame.attrs["units"] = units
+        return frame
+
+    def where(self, key, value):
+        """Return the rows where a column equals a value.
+
+        For dictionary encoded columns this compares integer codes instead of
+        strings, so it is much faster than comparing column values directly.
+
+        Parameters
+        ----------
+        key: :ref:`Record key <record-keys>`, required
+        value: any value, required
+
+        Returns
+        -------
+        rows: :class:`numpy.ndarray`
+            Boolean array that is `True` for rows where the column value equals
+            `value`.  Rows without a value are always `False`.
+        """
+        column = self._columns[key]
+        if column.categories is not None:
+            code = column.code(value)
+            if code is None:
+                return numpy.zeros(len(column), dtype=bool)
+            rows = column.values() == code
+        else:
+            rows = numpy.array(numpy.ma.filled(self[key] == value, False), dtype=bool)
+        mask = column.mask()
+        if mask is not None:
+            rows &= ~mask
+        return rows
+
+    @property
+    def spilled(self):
+        """True if column data has been moved into memory-mapped files."""
+        return self._allocator is not None
 
     def keys(self):
-        return self._columns.keys()
+        return list(self._columns.keys())
 
     def items(self):
-        return self._columns.items()
+        return [(key, self[key]) for key in self._columns]
 
     def values(self):
-        return self._columns.values()
+        return [self[key] for key in self._columns]
 
     def reset(self):
         self._columns = collections.OrderedDict()
+        self._cache = {}
+        self._schemas = {}
+        self._allocator = None
+        self._sorted = True
+        self._latest = None
+        self._order = None
+        self._times = None
+
+    def _decode(self, column, decoded):
+        """Decode the strings stored in a dictionary encoded column.
+
+        `decoded` is `None`, or the result of decoding the column earlier,
+        which is updated so only rows appended since then are decoded.
+        Returns `[column, strings, discarded, appended, categories]`, where
+        `strings` is a column containing the strings for rows
+        `[discarded, appended)` of the encoded column.
+        """
+        if decoded is None or decoded[0] is not column:
+            decoded = [column, _Column("", max_categories=None), column.discarded, column.discarded, None]
+        _, strings, discarded, appended, categories = decoded
+        if column.discarded > discarded:
+            strings.discard(column.discarded - discarded)
+            appended = max(appended, column.discarded)
+        if column.appended > appended:
+            if categories is None or len(categories) != len(column.categories):
+                categories = numpy.empty(len(column.categories), dtype=object)
+                categories[:] = column.categories
+            strings.extend(categories[column.values()[appended - column.discarded:]])
+        decoded[2:] = [column.discarded, column.appended, categories]
+        return decoded
+
+    def _positions(self, schema):
+        """Return the columns for each field of a schema record type, once they all exist."""
+        positions = self._schemas.get(schema)
+        if positions is None:
+            if not all(key in self._columns for key in schema.fields):
+                return None
+            positions = self._schemas[schema] = [
+                (self._columns[key], units is not None and units == self._columns[key].units, self._converted(key))
+                for key, units in zip(schema.fields, schema.units)
+                ]
+        return positions
+
+    def _converted(self, key):
+        """Return True if Arrow timestamps stored in a column are converted to `datetime64`."""
+        return self._datetime64 is True or (self._datetime64 is not None and key in self._datetime64)
+
+    def _create_column(self, key, value):
+        """Create storage for a new column."""
+        if self._compressed is True:
+            magnitude = _magnitude(value, value.units if isinstance(value, pipecat.quantity) else None)
+            if _dtype(magnitude).kind in "fM":
+                return _CompressedColumn(value, allocator=self._allocator)
+        elif self._compressed is not None and key in self._compressed:
+            return _CompressedColumn(value, allocator=self._allocator)
+        return _Column(value, limit=self._max_rows, allocator=self._allocator, max_categories=self._max_categories)
+
+    def _extend(self, count, columns):
+        """Append `count` rows from arrays of stored values.
+
+        `columns` maps keys to `(values, mask, units, categories)` tuples,
+        where `values` contains magnitudes in `units`, or codes into
+        `categories` for dictionary encoded strings, and `mask` is `None` or
+        marks the rows without values.  Columns that aren't included are
+        padded.
+        """
+        if not count:
+            return
+        rows = len(self)
+        for key, (values, mask, units, categories) in columns.items():
+            column = self._columns.get(key)
+            if column is None:
+                if categories is not None:
+                    seed = categories[0] if categories else ""
+                else:
+                    seed = values[0] if units is None else pipecat.quantity(values[0], units)
+                column = self._columns[key] = self._create_column(key, seed)
+                column.pad(rows)
+            if categories is not None:
+                if column.categories is not None:
+                    column.extend_codes(values, categories, mask)
+                    continue
+                strings = numpy.empty(len(categories), dtype=object)
+                strings[:] = categories
+                values = strings[values]
+            elif column.units != units:
+                if column.units is not None and units is not None:
+                    values = pipecat.quantity(values, units).to(column.units).magnitude
+                else:
+                    quantities = numpy.empty(count, dtype=object)
+                    for index, value in enumerate(values):
+                        quantities[index] = value if units is None else pipecat.quantity(value, units)
+                    values = quantities
+            column.extend(values, mask)
+        for column in self._columns.values():
+            if len(column) == rows:
+                column.pad(count)
+
+        if self._timestamp in columns:
+            values, mask = columns[self._timestamp][:2]
+            values = values if mask is None else values[~mask]
+            if len(values) and values.dtype.kind == "M":
+                if (self._latest is not None and values[0] < self._latest) or numpy.any(values[1:] < values[:-1]):
+                    self._sorted = False
+                self._latest = values.max() if self._latest is None else max(self._latest, values.max())
+
+        self._index_timestamps()
+        self._retain()
+        if self._allocator is None and self._spill_threshold is not None and self.nbytes > self._spill_threshold:
+            self._spill()
+
+    def _stored(self):
+        """Return `(key, values, mask, units, categories)` for each column, in the form accepted by :meth:`_extend`."""
+        return [(key, column.values(), column.mask(), column.units, column.categories) for key, column in self._columns.items()]
+
+    def _retain(self):
+        """Discard old rows that fall outside the retention policy."""
+        rows = len(self)
+        keep = rows
+        if self._max_rows is not None:
+            keep = min(keep, self._max_rows)
+        if self._max_bytes is not None:
+            itemsize = sum(column.itemsize for column in self._columns.values()) + (0 if self._times is None else self._times.itemsize)
+            if itemsize:
+                keep = min(keep, int(self._max_bytes // itemsize))
+        if self._max_age is not None and self._latest is not None:
+            column = self._columns[self._timestamp]
+            if column.dtype.kind in "MO":
+                cutoff = self._latest - self._max_age
+                expired = 0
+                while expired < rows and (not column.has_value(expired) or _datetime64(column.value(expired)) < cutoff):
+                    expired += 1
+                keep = min(keep, rows - expired)
+        if keep == rows:
+            return
+        for column in self._columns.values():
+            column.discard(len(column) - keep)
+        if self._times is not None:
+            self._times.discard(len(self._times) - keep)
+
+    def _timestamps(self):
+        """Return the timestamp column in sorted order, plus the row order if it isn't the storage order."""
+        if self._timestamp not in self._columns:
+            raise KeyError("Table doesn't contain timestamps in the %r column." % (self._timestamp,))
+        column = self._columns[self._timestamp]
+        timestamps = column.values() if self._times is None else self._times.values()
+        if self._sorted and not column.missing and timestamps.dtype.kind == "M":
+            return timestamps, None
+        if self._order is None or self._order[0] != column.version:
+            rows = numpy.arange(len(timestamps)) if not column.missing else numpy.flatnonzero(~column.mask())
+            times = timestamps[rows]
+            if times.dtype.kind != "M":
+                times = numpy.array([_datetime64(value) for value in times], dtype="datetime64[us]")
+            if self._sorted and not column.missing:
+                self._order = (column.version, None, times)
+            else:
+                order = numpy.argsort(times, kind="mergesort")
+                self._order = (column.version, rows[order], times[order])
+        return self._order[2], self._order[1]
+
+    def _index_timestamps(self):
+        """Keep `datetime64` copies of timestamps stored as Python objects, so searches don't have to convert them."""
+        column = self._columns.get(self._timestamp)
+        if column is None or column.dtype != object:
+            self._times = None
+            return
+        if self._times is None:
+            self._times = _Column(numpy.datetime64(0, "us"), limit=self._max_rows, allocator=self._allocator)
+        start = len(self._times)
+        if start == len(column):
+            return
+        values = column.values()[start:]
+        mask = column.mask()
+        mask = None if mask is None else mask[start:]
+        times = numpy.empty(len(values), dtype="datetime64[us]")
+        for index, value in enumerate(values):
+            times[index] = numpy.datetime64("NaT") if mask is not None and mask[index] else _datetime64(value)
+        self._times.extend(times, mask)
+
+    def _spill(self):
+        """Move column data into memory-mapped files."""
+        pipecat.log.debug("Moving %s bytes of table data to memory-mapped files.", self.nbytes)
+        self._allocator = _MemoryMapAllocator(self._spill_directory)
+        for column in self._columns.values():
+            column.reallocate(self._allocator)
+        if self._times is not None:
+            self._times.reallocate(self._allocator)
 
 
 class Cache(object):
-    """Cache records in memory for column-oriented access."""
-    def __init__(self, source):
+    """Cache records in memory for column-oriented access.
+
+    Any keyword arguments are passed to :class:`pipecat.store.Table`.
+    """
+    def __init__(self, source, **kwargs):
         self._source = source
-        self._storage = Table()
+        self._storage = Table(**kwargs)
 
     def __iter__(self):
         return self
@@ -87,34 +1235,504 @@ class Cache(object):
         return self._storage
 
 
-def cache(source):
+def cache(source, **kwargs):
     """Create an in-memory cache for records.
 
+    Examples
+    --------
+
+    Keep the most recent ten minutes of battery charger data:
+
+    >>> pipe = <battery charger pipeline>
+    >>> pipe = pipecat.utility.add_timestamp(pipe)
+    >>> pipe = pipecat.store.cache(pipe, max_age=pipecat.quantity(10, pipecat.units.minutes))
+
     Parameters
     ----------
     source: generator, required
         A source of records to be cached.
+    kwargs: optional
+        Retention policy and other options passed to :class:`pipecat.store.Table`.
 
     Return
     ------
     cache: instance of :class:`pipecat.store.Cache`.
     """
-    return Cache(source)
+    return Cache(source, **kwargs)
+
+
+class _Feed(object):
+    """Iterator that returns the most recently assigned record, so records can be pushed into a record generator."""
+    def __init__(self):
+        self.record = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self): # For Python 3
+        return self.record
+
+    def next(self): # For Python 2
+        return self.__next__()
+
+
+_segment_format = "%Y%m%dT%H%M%S.%fZ"
+_segment_pattern = re.compile(r"^(\d{8}T\d{6}\.\d{6}Z)(?:-(\d+))?$")
+
+
+def _window_start(timestamp, window):
+    """Return the beginning of the time window containing a timestamp."""
+    if window == "hourly":
+        return timestamp.astype("datetime64[h]").astype("datetime64[us]")
+    if window == "daily":
+        return timestamp.astype("datetime64[D]").astype("datetime64[us]")
+    width = numpy.timedelta64(int(window.to(pipecat.units.microseconds).magnitude), "us")
+    return timestamp - (timestamp - numpy.datetime64(0, "us")) % width
+
+
+def _segment_path(directory, prefix, suffix, start):
+    """Return an unused path for a segment that begins at a given time."""
+    name = arrow.get(start.astype(object)).strftime(_segment_format)
+    path = os.path.join(directory, prefix + name + suffix)
+    count = 0
+    while os.path.exists(path):
+        count += 1
+        path = os.path.join(directory, "%s%s-%s%s" % (prefix, name, count, suffix))
+    return path
+
+
+def segments(directory, prefix="", suffix="", since=None, until=None):
+    """Return the paths of segments created by :func:`rotate`, in order.
+
+    Each segment is assumed to contain records from the time in its name up
+    to the time in the next segment's name, so only segments that overlap
+    the given range of times are returned, without opening any files.
+
+    Parameters
+    ----------
+    directory: string, required
+        Directory containing segments.
+    prefix: string, optional
+        Prefix of the segment file names.
+    suffix: string, optional
+        Suffix of the segment file names.
+    since: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Beginning of the range (inclusive).
+    until: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        End of the range (exclusive).
+
+    Returns
+    -------
+    paths: list of strings
+    """
+    found = []
+    for name in os.listdir(directory):
+        if not name.startswith(prefix) or not name.endswith(suffix):
+            continue
+        match = _segment_pattern.match(name[len(prefix):len(name) - len(suffix)])
+        if match is None:
+            continue
+        start = _datetime64(arrow.Arrow.strptime(match.group(1), _segment_format))
+        found.append((start, int(match.group(2) or 0), os.path.join(directory, name)))
+    found.sort()
+
+    since = None if since is None else _datetime64(since)
+    until = None if until is None else _datetime64(until)
+    paths = []
+    for index, (start, _, path) in enumerate(found):
+        if until is not None and start >= until:
+            break
+        if since is not None and index + 1 < len(found) and found[index + 1][0] <= since:
+            continue
+        paths.append(path)
+    return paths
+
+
+def rotate(source, write, directory, prefix="", suffix="", max_bytes=None, window=None, timestamp="timestamp", **kwargs):
+    """Append records to a sequence of files, starting new files by size or time.
+
+    Each file, or segment, is named using the time of its first record, or
+    the start of its time window, so :func:`segments` and
+    :func:`read_segments` can locate the segments that overlap a range of
+    times without opening them.  Records without a timestamp use the current
+    time.
+
+    Examples
+    --------
+
+    Store charger records in a new pickle file every hour:
+
+    >>> pipe = pipecat.store.rotate(pipe, pipecat.store.pickle.write, "logs", prefix="charger-", suffix=".pickle", window="hourly")
+
+    Parameters
+    ----------
+    source: :ref:`Record generator <record-generators>`, required
+    write: callable, required
+        Store writer used to create each segment, such as
+        :func:`pipecat.store.pickle.write`.
+    directory: string, required
+        Directory where segments will be created.
+    prefix: string, optional
+        Prefix for segment file names.
+    suffix: string, optional
+        Suffix for segment file names, such as a file extension.
+    max_bytes: int, optional
+        Start a new segment once the current segment reaches this size.
+        Since writers may buffer records, segments can exceed this size by
+        the amount that has been buffered.
+    window: "hourly", "daily", or time quantity, optional
+        Start a new segment at the beginning of each time window.  Windows
+        are aligned to the Unix epoch, in UTC.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps.
+    kwargs: optional
+        Additional arguments passed to `write`.
+
+    Yields
+    ------
+    record: dict
+        Unmodified input records.
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    feed = _Feed()
+    writer = None
+    path = None
+    current = None
+    try:
+        for record in source:
+            moment = record.get(timestamp)
+            moment = _datetime64(arrow.utcnow() if moment is None else moment)
+            start = None
+            if writer is None:
+                start = moment if window is None else _window_start(moment, window)
+            elif window is not None and _window_start(moment, window) != current:
+                start = _window_start(moment, window)
+            elif max_bytes is not None and os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+                start = moment
+
+            if start is not None:
+                if writer is not None:
+                    writer.close()
+                path = _segment_path(directory, prefix, suffix, start)
+                writer = write(feed, path, **kwargs)
+                if window is not None:
+                    current = _window_start(moment, window)
+
+            feed.record = record
+            next(writer)
+            yield record
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def read_segments(read, directory, prefix="", suffix="", since=None, until=None, **kwargs):
+    """Read records from the segments created by :func:`rotate`, in order.
+
+    Only the segments that overlap the given range of times are opened.
+
+    Examples
+    --------
+
+    Read the last hour of records from hourly charger logs:
+
+    >>> now = arrow.utcnow()
+    >>> pipe = pipecat.store.read_segments(pipecat.store.pickle.read, "logs", prefix="charger-", suffix=".pickle", since=now.shift(hours=-1), until=now)
+
+    Parameters
+    ----------
+    read: callable, required
+        Store reader used to read each segment, such as
+        :func:`pipecat.store.pickle.read`.  If `since` or `until` are
+        specified, they are passed to the reader, which must support them.
+    directory: string, required
+        Directory containing segments.
+    prefix: string, optional
+        Prefix of the segment file names.
+    suffix: string, optional
+        Suffix of the segment file names.
+    since: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps at or after this time.
+    until: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps before this time.
+    kwargs: optional
+        Additional arguments passed to `read`.
+
+    Yields
+    ------
+    record: dict
+    """
+    if since is not None:
+        kwargs["since"] = since
+    if until is not None:
+        kwargs["until"] = until
+    for path in segments(directory, prefix, suffix, since, until):
+        for record in read(path, **kwargs):
+            yield record
+
+
+class _RecordEncoder(object):
+    """Encodes records in a compact form for storage.
+
+    Each record is encoded as a schema id and a tuple of values, with
+    quantities replaced by their magnitudes.  A schema contains the keys of a
+    record, and the units of each value, so they are stored once per schema
+    instead of once per record.  Schema ids are derived from their contents,
+    so they are stable across writers.  The first time a schema is seen,
+    :meth:`encode` also returns its definition, which must be stored before
+    any records that use it.
+    """
+    def __init__(self):
+        self._units = {}
+        self._schemas = {}
+
+    def encode(self, record):
+        keys = []
+        units = []
+        values = []
+        if isinstance(record, pipecat.record.CompactRecord):
+            fields = record.magnitudes()
+        else:
+            fields = [(key, value, None) for key, value in record.items()]
+        for key, value, unit in fields:
+            keys.append(key)
+            if unit is not None:
+                # Compact records supply magnitudes and units without creating quantities.
+                name = self._units.get(unit)
+                if name is None:
+                    name = self._units[unit] = str(unit)
+                units.append(name)
+                values.append(value)
+            elif isinstance(value, pipecat.quantity):
+                unit = value._units # pylint: disable=protected-access
+                name = self._units.get(unit)
+                if name is None:
+                    name = self._units[unit] = str(value.units)
+                units.append(name)
+                values.append(value.magnitude)
+            else:
+                units.append(None)
+                values.append(value)
+
+        schema = (tuple(keys), tuple(units))
+        definition = None
+        identifier = self._schemas.get(schema)
+        if identifier is None:
+            identifier = self._schemas[schema] = int(hashlib.sha1(repr(schema).encode("utf-8")).hexdigest()[:15], 16)
+            definition = (identifier,) + schema
+        return definition, (identifier, tuple(values))
+
+
+class _RecordDecoder(object):
+    """Decodes records created by :class:`_RecordEncoder`.
+
+    Plain records are returned unmodified, so stores can contain a mixture of
+    plain and encoded records.  If `missing` is specified, it will be called
+    with the decoder and schema id when a record uses an unknown schema, and
+    should locate the schema definition and pass it to :meth:`decode`.
+    """
+    def __init__(self, missing=None):
+        self._schemas = {}
+        self._missing = missing
+
+    def decode(self, item):
+        """Return a decoded record, or `None` if `item` is a schema definition."""
+        if isinstance(item, dict):
+            return item
+        if len(item) == 3:
+            identifier, keys, units = item
+            self._schemas[identifier] = (keys, [None if unit is None else pipecat.units.parse_units(unit) for unit in units])
+            return None
+
+        identifier, values = item
+        if identifier not in self._schemas and self._missing is not None:
+            self._missing(self, identifier)
+        if identifier not in self._schemas:
+            raise ValueError("Unknown record schema: %s" % identifier)
+        keys, units = self._schemas[identifier]
+        return dict(zip(keys, [value if unit is None else pipecat.quantity(value, unit) for value, unit in zip(values, units)]))
+
+
+class _BufferedWriter(object):
+    """Buffers data written to a file, flushing it in groups.
+
+    Data is written to the file once `count` writes or `size` bytes have been
+    buffered, or once `interval` seconds have elapsed since the previous
+    flush, whichever comes first.  Callers must call :meth:`flush` when they
+    are done writing.  If specified, `callback` is called after every flush.
+    """
+    def __init__(self, fobj, count=1, size=None, interval=None, fsync=False, callback=None):
+        self._fobj = fobj
+        self._callback = callback
+        self._count = count
+        self._size = size
+        self._interval = None if interval is None else interval.to(pipecat.units.seconds).magnitude
+        self._fsync = fsync
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = time.time()
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._count is not None and len(self._buffer) >= self._count:
+            self.flush()
+        elif self._size is not None and self._buffered >= self._size:
+            self.flush()
+        elif self._interval is not None and time.time() - self._last_flush >= self._interval:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._fobj.write(self._buffer[0][:0].join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        self._fobj.flush()
+        if self._fsync and hasattr(self._fobj, "fileno"):
+            os.fsync(self._fobj.fileno())
+        self._last_flush = time.time()
+        if self._callback is not None:
+            self._callback()
+
+
+_compression_extensions = {".gz": "gzip", ".bz2": "bz2", ".xz": "lzma", ".lzma": "lzma"}
+
+
+def _compression(fobj, compression):
+    """Return the compression to use for a file, inferring it from the file extension if necessary."""
+    if compression == "infer":
+        if isinstance(fobj, six.string_types):
+            return _compression_extensions.get(os.path.splitext(fobj)[1].lower())
+        return None
+    if compression not in (None, "gzip", "bz2", "lzma"):
+        raise ValueError("Unknown compression: %s" % compression)
+    return compression
+
+
+def _compressor(compression):
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if compression == "bz2":
+        import bz2
+        return bz2.BZ2Compressor()
+    import lzma # pylint: disable=import-error
+    return lzma.LZMACompressor()
+
+
+def _decompressing_reader(fobj, compression):
+    """Return a file-like object that decompresses a path or file-like object."""
+    if compression == "gzip":
+        import gzip
+        if isinstance(fobj, six.string_types):
+            return gzip.GzipFile(filename=fobj, mode="rb")
+        return gzip.GzipFile(fileobj=fobj, mode="rb")
+    if compression == "bz2":
+        import bz2
+        return bz2.BZ2File(fobj, "rb")
+    import lzma # pylint: disable=import-error
+    return lzma.LZMAFile(fobj, "rb")
+
+
+class _CompressedWriter(io.RawIOBase):
+    """Writes data to a file as a sequence of independently compressed blocks.
+
+    Each call to :meth:`flush` completes the current block, so it can be
+    decompressed even if the writer never finishes.  The gzip, bz2, and lzma
+    formats all allow blocks to be concatenated, so the file can be read using
+    the standard library modules.
+    """
+    def __init__(self, fobj, compression, path=None):
+        super(_CompressedWriter, self).__init__()
+        self._fobj = fobj
+        self._compression = compression
+        self._path = path
+        self._compressor = None
+        self._pending = 0
+        self._position = None
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            if self._compressor is None:
+                self._compressor = _compressor(self._compression)
+            self._fobj.write(self._compressor.compress(bytes(data)))
+            self._pending += len(data)
+            if self._position is not None:
+                self._position += len(data)
+        return len(data)
+
+    def flush(self):
+        if self.closed:
+            return
+        if self._compressor is not None:
+            self._fobj.write(self._compressor.flush())
+            self._compressor = None
+            self._pending = 0
+        self._fobj.flush()
+
+    def fileno(self):
+        return self._fobj.fileno()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset != 0 or whence != io.SEEK_END:
+            raise io.UnsupportedOperation("Compressed files can only seek to the end.")
+        return self.tell()
+
+    def tell(self):
+        """Return the uncompressed size of the file."""
+        if self._position is None:
+            if self._path is None:
+                raise io.UnsupportedOperation("Can't determine the uncompressed size of a file object.")
+            self._fobj.flush()
+            self._position = self._pending
+            if os.path.getsize(self._path):
+                with _decompressing_reader(self._path, self._compression) as stream:
+                    for chunk in iter(lambda: stream.read(1048576), b""):
+                        self._position += len(chunk)
+        return self._position
 
 
 class _FileHelper(object):
-    def __init__(self, fobj, mode):
+    """Context manager that opens a path, or uses an existing file-like object.
+
+    If `compression` is specified, the file is compressed or decompressed
+    transparently (see :func:`_compression`).  Text modes use a
+    :class:`io.TextIOWrapper` with the given `newline` handling.
+    """
+    def __init__(self, fobj, mode, buffering=-1, compression=None, newline=None):
         self._fobj = fobj
         self._mode = mode
-        self._file = None
+        self._buffering = buffering
+        self._compression = compression
+        self._newline = newline
+        self._opened = []
 
     def __enter__(self):
-        if isinstance(self._fobj, six.string_types):
-            self._file = open(self._fobj, self._mode)
-            return self._file
+        path = self._fobj if isinstance(self._fobj, six.string_types) else None
+        compression = _compression(self._fobj, self._compression)
+        if compression is None:
+            if path is None:
+                return self._fobj
+            if self._newline is not None:
+                self._opened.append(io.open(path, self._mode, self._buffering, newline=self._newline))
+            else:
+                self._opened.append(open(path, self._mode, self._buffering))
+            return self._opened[-1]
+
+        if "r" in self._mode:
+            self._opened.append(_decompressing_reader(self._fobj, compression))
         else:
-            return self._fobj
+            if path is not None:
+                self._opened.append(open(path, "ab"))
+            self._opened.append(_CompressedWriter(self._opened[-1] if path is not None else self._fobj, compression, path))
+        if "b" not in self._mode:
+            self._opened.append(io.TextIOWrapper(self._opened[-1], encoding="utf-8", newline=self._newline))
+        return self._opened[-1]
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if isinstance(self._fobj, six.string_types):
-            self._file.close()
+        while self._opened:
+            self._opened.pop().close()
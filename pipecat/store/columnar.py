@@ -0,0 +1,333 @@
+# Copyright 2016 Timothy M. Shead
+#
+# This file is part of Pipecat.
+#
+# Pipecat is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pipecat is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pipecat.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for reading and writing data using a columnar file format.
+
+Columnar files store records in row groups.  Each row group begins with a
+header that describes the keys, types, and units of its columns, followed by
+one compressed chunk of values per column.  Because every chunk is stored
+separately, readers can load just the columns they need, skipping the rest
+without decompressing them.  The header also stores the range of timestamps
+in the row group, so row groups outside a range of times are skipped
+entirely.  This makes columnar files much faster than pickle or CSV files
+when only a few columns are needed from records with many fields, such as
+those produced by :func:`pipecat.device.charger.icharger208b`.
+
+Each row group is stored as:
+
+* The four bytes "PCRG".
+* The length of the header, as a little-endian 32-bit unsigned integer.
+* The header, as a UTF-8 encoded JSON object.
+* The value and validity chunks for each column, in the order they appear in the header.
+
+Numeric and timestamp chunks are compressed as in :class:`pipecat.store.Table`
+compressed columns, strings are dictionary encoded, and any other values are
+pickled.
+
+.. warning::
+   Columnar files containing pickled values written using Python 2 cannot be read using Python 3, and vice-versa.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import collections
+import json
+import os
+import pickle
+import struct
+import zlib
+
+import arrow
+import numpy
+import pint
+
+import pipecat.store
+
+_prefix = struct.Struct("<4sI")
+_magic = b"PCRG"
+
+
+def _encode_key(key):
+    return list(key) if isinstance(key, tuple) else key
+
+
+def _decode_key(key):
+    return tuple(key) if isinstance(key, list) else key
+
+
+def _write_group(fobj, table, timestamp):
+    """Write the contents of a table as a row group."""
+    columns = []
+    chunks = []
+    timestamps = None
+    for key, values, mask, units, categories in table._stored(): # pylint: disable=protected-access
+        if values.dtype.kind in "biufM":
+            dtype, data = pipecat.store._compress_block(values)
+            encoding = "delta"
+        else:
+            dtype, data = "object", zlib.compress(pickle.dumps(list(values), protocol=2))
+            encoding = "pickle"
+        valid = b"" if mask is None else zlib.compress(numpy.packbits(~mask).tobytes())
+        columns.append({
+            "key": _encode_key(key),
+            "dtype": dtype,
+            "encoding": encoding,
+            "units": None if units is None else str(units),
+            "categories": categories,
+            "size": len(data),
+            "mask": len(valid),
+            })
+        chunks += [data, valid]
+
+        if key == timestamp and values.dtype.kind == "M":
+            present = (values if mask is None else values[~mask]).astype("datetime64[us]").astype(numpy.int64)
+            if len(present):
+                timestamps = [int(present.min()), int(present.max())]
+
+    header = json.dumps({"rows": len(table), "timestamps": timestamps, "columns": columns}).encode("utf-8")
+    fobj.write(_prefix.pack(_magic, len(header)))
+    fobj.write(header)
+    for chunk in chunks:
+        fobj.write(chunk)
+    fobj.flush()
+
+
+def _read_column(fobj, column, rows, units):
+    """Read and decompress the chunks for one column of a row group."""
+    data = fobj.read(column["size"])
+    valid = fobj.read(column["mask"])
+    if column["encoding"] == "delta":
+        values = pipecat.store._decompress_block((column["dtype"], data), rows)
+    else:
+        pint.set_application_registry(pipecat._unit_registry()) # pylint: disable=protected-access
+        values = numpy.empty(rows, dtype=object)
+        values[:] = pickle.loads(zlib.decompress(data))
+    mask = None
+    if valid:
+        mask = ~numpy.unpackbits(numpy.frombuffer(zlib.decompress(valid), dtype=numpy.uint8))[:rows].astype(bool)
+    if column["units"] is not None and column["units"] not in units:
+        units[column["units"]] = pipecat.units.parse_units(column["units"])
+    return values, mask, None if column["units"] is None else units[column["units"]], column["categories"]
+
+
+def _groups(fobj, keys, start, stop, since, until, timestamp, compression):
+    """Yield the row count and columns for each row group that intersects the requested ranges."""
+    if (start is not None and start < 0) or (stop is not None and stop < 0):
+        raise ValueError("start and stop must be None or non-negative integers.")
+    keys = None if keys is None else set(keys)
+    since = None if since is None else pipecat.store._datetime64(since)
+    until = None if until is None else pipecat.store._datetime64(until)
+    timed = since is not None or until is not None
+    units = {}
+
+    with pipecat.store._FileHelper(fobj, "rb", compression=compression) as fobj: # pylint: disable=redefined-argument-from-local
+        position = 0
+        while stop is None or position < stop:
+            prefix = fobj.read(_prefix.size)
+            if len(prefix) < _prefix.size:
+                break
+            magic, length = _prefix.unpack(prefix)
+            if magic != _magic:
+                raise ValueError("Not a columnar file, or the file is corrupt.")
+            header = json.loads(fobj.read(length).decode("utf-8"))
+
+            rows = header["rows"]
+            first = position
+            position += rows
+            skip = start is not None and position <= start
+            if timed:
+                bounds = header["timestamps"]
+                if bounds is None:
+                    skip = True
+                else:
+                    skip = skip or (since is not None and bounds[1] < since.astype(numpy.int64))
+                    skip = skip or (until is not None and bounds[0] >= until.astype(numpy.int64))
+            if skip:
+                fobj.seek(sum(column["size"] + column["mask"] for column in header["columns"]), os.SEEK_CUR)
+                continue
+
+            columns = collections.OrderedDict()
+            for column in header["columns"]:
+                key = _decode_key(column["key"])
+                if keys is not None and key not in keys and not (timed and key == timestamp):
+                    fobj.seek(column["size"] + column["mask"], os.SEEK_CUR)
+                    continue
+                columns[key] = _read_column(fobj, column, rows, units)
+
+            selection = numpy.zeros(rows, dtype=bool)
+            selection[max(0, (start or 0) - first):rows if stop is None else stop - first] = True
+            if timed:
+                values, mask = columns[timestamp][:2] if timestamp in columns else (None, None)
+                if values is None or values.dtype.kind != "M":
+                    continue
+                if mask is not None:
+                    selection &= ~mask
+                if since is not None:
+                    selection &= values >= since
+                if until is not None:
+                    selection &= values < until
+                if keys is not None and timestamp not in keys:
+                    del columns[timestamp]
+
+            count = int(numpy.count_nonzero(selection))
+            if not count:
+                continue
+            if count < rows:
+                for key, (values, mask, column_units, categories) in columns.items():
+                    columns[key] = (values[selection], None if mask is None else mask[selection], column_units, categories)
+            yield count, columns
+
+
+def write(source, fobj, row_group_size=65536, timestamp="timestamp", max_categories=256, compression="infer"):
+    """Append records to a columnar file.
+
+    Records are collected in memory until there are `row_group_size` of
+    them, then written as a row group.  Any remaining records are written when
+    this generator is closed or the source raises an exception.
+
+    Examples
+    --------
+
+    Store charger records, then load just the voltage and current:
+
+    >>> pipe = pipecat.store.columnar.write(pipe, "charger.columnar")
+    >>> for record in pipe:
+    ...     pass
+    >>> table = pipecat.store.columnar.load("charger.columnar", keys=[("battery", "voltage"), ("battery", "current")])
+
+    Parameters
+    ----------
+    source: :ref:`Record generator <record-generators>`, required
+    fobj: file-like object or string, required
+        File, or path of a file, where records will be appended.
+    row_group_size: int, optional
+        Number of records to store in each row group.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps, whose range is stored with each row group.
+    max_categories: int, optional
+        Maximum number of distinct strings in a row group before they are
+        stored individually instead of dictionary encoded.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compress the file using the given algorithm, in addition to the
+        per-column compression, as with :func:`pipecat.store.pickle.write`.
+        Each row group is a separate compressed block.  By default,
+        compression is inferred from the file extension.
+
+    Yields
+    ------
+    record: dict
+        Unmodified input records.
+    """
+    table = pipecat.store.Table(timestamp=timestamp, max_categories=max_categories, datetime64=True)
+    with pipecat.store._FileHelper(fobj, "a+b", compression=compression) as fobj: # pylint: disable=redefined-argument-from-local
+        try:
+            for record in source:
+                table.append(record)
+                if len(table) >= row_group_size:
+                    _write_group(fobj, table, timestamp)
+                    table.reset()
+                yield record
+        finally:
+            if len(table):
+                _write_group(fobj, table, timestamp)
+
+
+def load(fobj, keys=None, start=None, stop=None, since=None, until=None, timestamp="timestamp", compression="infer", **kwargs):
+    """Load columns from a columnar file into a table.
+
+    Only the chunks for the requested columns and row groups are read and
+    decompressed, and they are added to the table in bulk, without creating
+    records.
+
+    Parameters
+    ----------
+    fobj: file-like object or string, required
+        File, or path of a file, containing records to be loaded.
+    keys: sequence of :ref:`Record keys <record-keys>`, optional
+        Columns to load.  By default, every column is loaded.
+    start: int, optional
+        Position of the first record to load.
+    stop: int, optional
+        Position of the record following the last record to load.
+    since: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only load records with timestamps at or after this time.
+    until: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only load records with timestamps before this time.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compression used by the file.  By default, compression is inferred
+        from the file extension.
+
+    Any remaining keyword arguments are passed to :class:`pipecat.store.Table`.
+
+    Returns
+    -------
+    table: :class:`pipecat.store.Table`
+    """
+    table = pipecat.store.Table(timestamp=timestamp, **kwargs)
+    for count, columns in _groups(fobj, keys, start, stop, since, until, timestamp, compression):
+        table._extend(count, columns) # pylint: disable=protected-access
+    return table
+
+
+def read(fobj, keys=None, start=None, stop=None, since=None, until=None, timestamp="timestamp", compression="infer"):
+    """Read records from a columnar file.
+
+    Timestamps are returned as :class:`arrow.arrow.Arrow` instances in UTC.
+    Use :func:`load` instead when the results will be stored in a
+    :class:`pipecat.store.Table`, since it avoids creating records entirely.
+
+    Parameters
+    ----------
+    fobj: file-like object or string, required
+        File, or path of a file, containing records to be read.
+    keys: sequence of :ref:`Record keys <record-keys>`, optional
+        Keys to include in the records.  By default, every key is included.
+    start: int, optional
+        Position of the first record to return.
+    stop: int, optional
+        Position of the record following the last record to return.
+    since: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps at or after this time.
+    until: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps before this time.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compression used by the file.  By default, compression is inferred
+        from the file extension.
+
+    Yields
+    ------
+    record: dict
+    """
+    for count, columns in _groups(fobj, keys, start, stop, since, until, timestamp, compression):
+        fields = []
+        for key, (values, mask, units, categories) in columns.items():
+            if categories is not None:
+                values = [categories[code] for code in values.tolist()]
+            elif values.dtype.kind == "M":
+                values = [arrow.get(value) for value in values.astype("datetime64[us]").tolist()]
+            elif units is not None:
+                values = [pipecat.quantity(value, units) for value in values.tolist()]
+            else:
+                values = values.tolist()
+            fields.append((key, values, None if mask is None else mask.tolist()))
+
+        for row in range(count):
+            yield dict((key, values[row]) for key, values, mask in fields if mask is None or not mask[row])
@@ -0,0 +1,204 @@
+# Copyright 2016 Timothy M. Shead
+#
+# This file is part of Pipecat.
+#
+# Pipecat is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pipecat is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pipecat.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for converting and compacting stored records.
+
+The store format of each file is determined by its extension: ".pickle" for
+:mod:`pipecat.store.pickle`, ".columnar" for :mod:`pipecat.store.columnar`,
+".csv" for :mod:`pipecat.store.csv`, and ".db" or ".sqlite" for
+:mod:`pipecat.store.sqlite`, optionally followed by a compression extension
+such as ".gz".  Files with other extensions are assumed to be pickle files.
+Index files created by :func:`pipecat.store.pickle.write` are skipped when
+converting directories.
+
+The `pipecat-convert` script provides a command line interface to
+:func:`convert`.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import multiprocessing
+import os
+import time
+
+import pipecat.record
+import pipecat.store
+import pipecat.store.columnar
+import pipecat.store.csv
+import pipecat.store.pickle
+import pipecat.store.sqlite
+
+formats = {
+    "columnar": pipecat.store.columnar,
+    "csv": pipecat.store.csv,
+    "pickle": pipecat.store.pickle,
+    "sqlite": pipecat.store.sqlite,
+    }
+"""Maps format names to the modules that read and write them."""
+
+_extensions = {".columnar": "columnar", ".csv": "csv", ".pickle": "pickle", ".db": "sqlite", ".sqlite": "sqlite"}
+_default_extensions = {"columnar": ".columnar", "csv": ".csv", "pickle": ".pickle", "sqlite": ".db"}
+_compression_extensions = {"gzip": ".gz", "bz2": ".bz2", "lzma": ".xz"}
+_sidecar_extensions = [".index"]
+
+
+def _split(path):
+    """Return the name, format, and compression of a file."""
+    name = os.path.basename(path)
+    compression = pipecat.store._compression(path, "infer")
+    if compression is not None:
+        name = os.path.splitext(name)[0]
+    name, extension = os.path.splitext(name)
+    if extension not in _extensions:
+        name, extension = name + extension, ".pickle"
+    return name, _extensions[extension], compression
+
+
+def _records(paths, drop):
+    for path in paths:
+        for record in formats[_split(path)[1]].read(path):
+            for key in drop:
+                pipecat.record.remove_field(record, key)
+            yield record
+
+
+def _convert(job):
+    """Convert a group of files into one file, for use in a worker process."""
+    paths, output, format, drop, options = job # pylint: disable=redefined-builtin
+    start = time.time()
+    count = 0
+    for _ in formats[format].write(_records(paths, drop), output, **options):
+        count += 1
+    return output, count, sum(os.path.getsize(path) for path in paths), time.time() - start
+
+
+def _expand(paths):
+    """Replace directories with the files they contain, in sorted order, skipping index files."""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1] in _sidecar_extensions:
+                    continue
+                if os.path.isfile(os.path.join(path, name)):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def _groups(paths, merge_bytes):
+    """Group consecutive files until each group contains at least `merge_bytes` bytes."""
+    if merge_bytes is None:
+        return [[path] for path in paths]
+    groups = []
+    size = 0
+    for path in paths:
+        if not groups or size >= merge_bytes:
+            groups.append([])
+            size = 0
+        groups[-1].append(path)
+        size += os.path.getsize(path)
+    return groups
+
+
+def convert(paths, directory, format="columnar", drop=None, merge_bytes=None, processes=None, compression=None, **kwargs): # pylint: disable=redefined-builtin
+    """Convert stored records to another format.
+
+    Each group of input files is converted into a single output file in
+    `directory`, named after the first file in the group.  Groups whose first
+    files have the same name (without extensions) can't be converted
+    together.  Groups are
+    converted in parallel using a pool of worker processes.  Files are
+    processed in the order given, so segments created by
+    :func:`pipecat.store.rotate` should be listed in time order (for example,
+    using :func:`pipecat.store.segments`).
+
+    Examples
+    --------
+
+    Merge hourly pickle logs into columnar files of at least 100MB, without the
+    individual cell voltages:
+
+    >>> paths = pipecat.store.segments("logs", suffix=".pickle")
+    >>> drop = [("battery", "cell%s" % cell, "voltage") for cell in range(1, 9)]
+    >>> pipecat.store.convert.convert(paths, "archive", format="columnar", drop=drop, merge_bytes=100000000)
+
+    Parameters
+    ----------
+    paths: sequence of strings, required
+        Paths of the files to be converted.  Directories are replaced with the
+        files they contain, sorted by name, except for index files.
+    directory: string, required
+        Directory where converted files will be written.
+    format: string, optional
+        Output format, one of the keys in :data:`formats`.
+    drop: sequence of :ref:`Record keys <record-keys>`, optional
+        Keys to remove from every record.
+    merge_bytes: int, optional
+        Merge consecutive input files into one output file, until each output
+        file has at least this many bytes of input.  By default, each input
+        file is converted to a separate output file.
+    processes: int, optional
+        Number of worker processes.  Defaults to the number of CPUs.  Use
+        `1` to convert files in the calling process.
+    compression: "gzip", "bz2", "lzma", or `None`, optional
+        Compression for the output files.  Not supported for the "sqlite" format.
+    kwargs: optional
+        Additional arguments passed to the writer for `format`.
+
+    Returns
+    -------
+    statistics: dict
+        Contains the number of "files" written, plus the total number of
+        "records" and input "bytes" converted, the elapsed "seconds", and the
+        resulting "records_per_second" and "bytes_per_second".
+    """
+    if format not in formats:
+        raise ValueError("Unknown format: %s" % format)
+    if compression is not None and format == "sqlite":
+        raise ValueError("SQLite databases can't be compressed.")
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    extension = _default_extensions[format] + ("" if compression is None else _compression_extensions[compression])
+    jobs = []
+    outputs = {}
+    for group in _groups(list(_expand(paths)), merge_bytes):
+        output = os.path.join(directory, _split(group[0])[0] + extension)
+        if os.path.exists(output):
+            raise ValueError("Output file %s already exists." % output)
+        if output in outputs:
+            raise ValueError("Converting %s and %s would both write %s." % (outputs[output], group[0], output))
+        outputs[output] = group[0]
+        jobs.append((group, output, format, list(drop or []), kwargs))
+
+    start = time.time()
+    statistics = {"files": 0, "records": 0, "bytes": 0}
+    pool = None if processes == 1 else multiprocessing.Pool(processes)
+    try:
+        for output, count, size, seconds in (map(_convert, jobs) if pool is None else pool.imap_unordered(_convert, jobs)):
+            pipecat.log.info("Wrote %s records to %s in %.3f seconds.", count, output, seconds)
+            statistics["files"] += 1
+            statistics["records"] += count
+            statistics["bytes"] += size
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    statistics["seconds"] = time.time() - start
+    statistics["records_per_second"] = statistics["records"] / statistics["seconds"] if statistics["seconds"] else 0.0
+    statistics["bytes_per_second"] = statistics["bytes"] / statistics["seconds"] if statistics["seconds"] else 0.0
+    return statistics
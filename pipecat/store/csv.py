@@ -16,19 +16,297 @@
 # along with Pipecat.  If not, see <http://www.gnu.org/licenses/>.
 
 """Functions for reading and writing CSV data.
+
+CSV files are written in "wide" format, with one row per record and one
+column per key.  The header contains the name of each column, formed by
+joining :ref:`hierarchical keys <record-keys>` with "/", followed by the units
+of quantities in square brackets, for example "battery/voltage [volt]".
+Timestamps are written in ISO 8601 format in UTC, and missing values are
+written as empty cells.
 """
 
 from __future__ import absolute_import, division, print_function
 
+import collections
+import csv
+import os
+import re
+
+import arrow
+import numpy
+import six
+
 import pipecat.store
 
+_header_pattern = re.compile(r"^(.*) \[(.*)\]$")
+_infer = object()
+_timestamp_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})$")
+
+
+def _column_header(key, units, delimiter):
+    name = pipecat.store._column_name(key, delimiter)
+    return name if units is None else "%s [%s]" % (name, units)
+
+
+def _parse_header(header, delimiter):
+    """Return the key and units for each column in a header."""
+    keys = []
+    units = []
+    for name in header:
+        match = _header_pattern.match(name)
+        name, unit = (match.group(1), pipecat.units.parse_units(match.group(2))) if match else (name, None)
+        keys.append(tuple(name.split(delimiter)) if delimiter in name else name)
+        units.append(unit)
+    return keys, units
+
+
+def _format(value, units):
+    if value is None:
+        return ""
+    if units is not None and isinstance(value, pipecat.quantity):
+        return repr(pipecat.store._magnitude(value, units))
+    if isinstance(value, arrow.Arrow):
+        return value.to("UTC").isoformat()
+    if isinstance(value, float):
+        return repr(value)
+    return value
+
+
+def _read_header(fobj, delimiter, compression):
+    """Return the keys and units from an existing file, or `None` if the file is empty."""
+    if not isinstance(fobj, six.string_types) or not os.path.exists(fobj) or not os.path.getsize(fobj):
+        return None
+    with _open(fobj, "r", compression) as stream:
+        return _parse_header(next(csv.reader(stream)), delimiter)
+
+
+def _open(fobj, mode, compression):
+    """Open a CSV file in the mode expected by the :mod:`csv` module."""
+    if six.PY2: # pragma: no cover
+        return pipecat.store._FileHelper(fobj, mode + "b", compression=compression)
+    return pipecat.store._FileHelper(fobj, mode, compression=compression, newline="")
+
+
+def write(source, fobj, keys=None, units=None, delimiter="/", flush_count=100, flush_bytes=None, flush_interval=None, compression="infer"):
+    """Append records to a CSV file.
+
+    The file columns are determined by `keys`, or by the keys of the first
+    record if `keys` isn't specified.  When appending to an existing file, its
+    header is used instead.  Values for keys that aren't file columns are
+    ignored.  Quantities are converted to the units of their column, which
+    are taken from `units`, or from the first record that contains the
+    column.  If the first record doesn't contain a quantity for a column, and
+    `units` doesn't specify its units, quantities in that column are written
+    as strings.
+
+    Rows are buffered and written in groups, as with
+    :func:`pipecat.store.pickle.write`.
+
+    Parameters
+    ----------
+    source: :ref:`Record generator <record-generators>`, required
+    fobj: file-like object or string, required
+        File, or path of a file, where records will be appended.
+    keys: sequence of :ref:`Record keys <record-keys>`, optional
+        Keys to write, in column order.
+    units: dict, optional
+        Maps keys to the units that will be used for their columns.
+    delimiter: string, optional
+        Used to join :ref:`hierarchical keys <record-keys>` into column names.
+    flush_count: int, optional
+        Maximum number of rows to buffer before flushing, or `None` for no limit.
+    flush_bytes: int, optional
+        Maximum number of bytes to buffer before flushing.
+    flush_interval: time quantity, optional
+        Maximum time between flushes.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compress rows using the given algorithm, as with
+        :func:`pipecat.store.pickle.write`.  By default, compression is
+        inferred from the file extension.
+
+    Yields
+    ------
+    record: dict
+        Unmodified input records.
+    """
+    header = _read_header(fobj, delimiter, compression)
+    columns = None if header is None else list(zip(*header))
+
+    with _open(fobj, "a", compression) as stream:
+        writer = pipecat.store._BufferedWriter(stream, count=flush_count, size=flush_bytes, interval=flush_interval)
+        rows = csv.writer(writer, lineterminator="\n")
+        try:
+            for record in source:
+                if columns is None:
+                    columns = []
+                    for key in (keys if keys is not None else record.keys()):
+                        value = record.get(key)
+                        unit = units.get(key) if units is not None else None
+                        if unit is None and isinstance(value, pipecat.quantity):
+                            unit = value.units
+                        columns.append((key, unit))
+                    rows.writerow([_column_header(key, unit, delimiter) for key, unit in columns])
+                rows.writerow([_format(record.get(key), unit) for key, unit in columns])
+                yield record
+        finally:
+            writer.flush()
 
-def write(source, fobj):
-    """Append records to a CSV file."""
-    with pipecat.store._FileHelper(fobj, "a+b") as fobj: # pylint: disable=redefined-argument-from-local
-        for record in source:
-            start_record = 1
-            for key, value in sorted(record.items()):
-                fobj.write("%s,%s,%s\n" % (start_record, key, value))
-                start_record = 0
+
+def _parser(values):
+    """Return a function that converts cells to values, based on the first non-empty cell in a column."""
+    for value in values:
+        if value:
+            break
+    else:
+        return None
+    if _timestamp_pattern.match(value):
+        return arrow.get
+    for parse in (int, float):
+        try:
+            parse(value)
+            return parse
+        except ValueError:
+            pass
+    return None
+
+
+def _rows(fobj, compression):
+    with _open(fobj, "r", compression) as stream:
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return None, []
+        return header, list(reader)
+
+
+def read(fobj, delimiter="/", compression="infer"):
+    """Read records from a CSV file.
+
+    Rows are read one at a time as records are returned, so files of any
+    size can be read.  The type of each column is inferred from its first
+    value: timestamps are returned as :class:`arrow.arrow.Arrow` instances,
+    numbers as integers or floating point values (or quantities, if the
+    column has units), and anything else as strings.  Empty cells are omitted
+    from records.
+
+    Parameters
+    ----------
+    fobj: file-like object or string, required
+        File, or path of a file, containing records to be read.
+    delimiter: string, optional
+        Used to split column names into :ref:`hierarchical keys <record-keys>`.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compression used by the file.  By default, compression is inferred
+        from the file extension.
+
+    Yields
+    ------
+    record: dict
+    """
+    with _open(fobj, "r", compression) as stream:
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return
+        keys, units = _parse_header(header, delimiter)
+        # Column types are inferred from the first non-empty cell in each column, as it is read.
+        converters = []
+        for unit in units:
+            if unit is not None:
+                converters.append(lambda value, unit=unit: pipecat.quantity(float(value), unit))
+            else:
+                converters.append(_infer)
+
+        for row in reader:
+            record = {}
+            for index, (key, value) in enumerate(zip(keys, row)):
+                if value:
+                    convert = converters[index]
+                    if convert is _infer:
+                        convert = converters[index] = _parser([value])
+                    try:
+                        record[key] = value if convert is None else convert(value)
+                    except (ValueError, arrow.parser.ParserError):
+                        record[key] = value
             yield record
+
+
+def _column(values, units, max_categories):
+    """Convert a column of cells to the form accepted by :meth:`pipecat.store.Table._extend`, or `None` if every cell is empty."""
+    values = numpy.array(values, dtype=object if not len(values) else None)
+    mask = values == ""
+    if not numpy.any(mask):
+        mask = None
+    present = values if mask is None else values[~mask]
+    if not len(present):
+        return None
+    parse = _parser(present)
+    if units is not None:
+        parse = float
+
+    if parse is arrow.get:
+        if all(value.endswith("+00:00") for value in present):
+            converted = numpy.zeros(len(values), dtype="datetime64[us]")
+            converted[~mask if mask is not None else slice(None)] = numpy.array([value[:-6] for value in present], dtype="datetime64[us]")
+        else:
+            converted = numpy.zeros(len(values), dtype="datetime64[us]")
+            converted[~mask if mask is not None else slice(None)] = [pipecat.store._datetime64(value) for value in present]
+        return converted, mask, None, None
+    if parse is not None:
+        try:
+            converted = numpy.zeros(len(values), dtype=numpy.int64 if parse is int else numpy.float64)
+            converted[~mask if mask is not None else slice(None)] = present.astype(converted.dtype)
+            return converted, mask, units, None
+        except ValueError:
+            pass
+
+    categories, codes = numpy.unique(present.astype(six.text_type), return_inverse=True)
+    if max_categories and len(categories) <= max_categories:
+        converted = numpy.zeros(len(values), dtype=numpy.min_scalar_type(max(0, max_categories - 1)))
+        converted[~mask if mask is not None else slice(None)] = codes
+        return converted, mask, None, [six.text_type(category) for category in categories]
+    converted = numpy.empty(len(values), dtype=object)
+    converted[~mask if mask is not None else slice(None)] = present
+    return converted, mask, None, None
+
+
+def load(fobj, keys=None, delimiter="/", compression="infer", **kwargs):
+    """Load columns from a CSV file into a table.
+
+    Each column is converted in a single operation, without creating
+    records, so this is much faster than storing the output of :func:`read`.
+    Column types are inferred as for :func:`read`, and columns without any
+    values are omitted, as they are from the records returned by :func:`read`.
+
+    Parameters
+    ----------
+    fobj: file-like object or string, required
+        File, or path of a file, containing records to be loaded.
+    keys: sequence of :ref:`Record keys <record-keys>`, optional
+        Columns to load.  By default, every column is loaded.
+    delimiter: string, optional
+        Used to split column names into :ref:`hierarchical keys <record-keys>`.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compression used by the file.  By default, compression is inferred
+        from the file extension.
+
+    Any remaining keyword arguments are passed to :class:`pipecat.store.Table`.
+
+    Returns
+    -------
+    table: :class:`pipecat.store.Table`
+    """
+    table = pipecat.store.Table(**kwargs)
+    header, rows = _rows(fobj, compression)
+    if header is None or not rows:
+        return table
+    names, units = _parse_header(header, delimiter)
+    cells = list(zip(*rows))
+    columns = collections.OrderedDict()
+    for key, unit, values in zip(names, units, cells):
+        if keys is None or key in keys:
+            column = _column(values, unit, kwargs.get("max_categories", 256))
+            if column is not None:
+                columns[key] = column
+    table._extend(len(rows), columns) # pylint: disable=protected-access
+    return table
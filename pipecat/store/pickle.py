@@ -20,32 +20,622 @@
 .. warning::
    Pickle files written using Python 2 cannot be read using Python 3, and vice-versa.
 
+Pickle files can optionally be accompanied by a "sidecar" index file, which
+stores the record number, timestamp, and byte offset of every record as a
+sequence of fixed-size binary entries.  When an index is available,
+:func:`read` uses it to seek directly to the records that it returns, instead
+of reading the file from the beginning.  Once a file has an index,
+:func:`write` keeps it up to date.  If an uncompressed file has been
+modified without updating its index, :func:`read` ignores the index and
+reads the file sequentially.
+
+Records can optionally be stored using a compact encoding, in which
+quantities are stored as magnitudes, and record keys and units are stored
+once for each distinct combination of keys and units instead of once per
+record.  This makes files several times smaller, and faster to read and
+write.
+
 """
 
 from __future__ import absolute_import, division, print_function
 
+import io
+import itertools
+import multiprocessing
+import os
 import pickle
+import time
 
+import numpy
 import pint
+import six
 
+import pipecat.record
 import pipecat.store
 
+index_dtype = numpy.dtype([("record", "<i8"), ("timestamp", "<M8[us]"), ("offset", "<i8")])
+"""Numpy type for the entries in an index file."""
 
-def write(source, fobj):
-    """Append records to a pickle file."""
-    with pipecat.store._FileHelper(fobj, "a+b") as fobj: # pylint: disable=redefined-argument-from-local
-        for record in source:
-            pickle.dump(record, fobj)
-            fobj.flush()
-            yield record
 
+class _Indexer(object):
+    """Appends entries to an index file as records are written."""
+    def __init__(self, fobj, index, timestamp):
+        fobj.seek(0, os.SEEK_END)
+        self._offset = fobj.tell()
+        self._file = pipecat.store._FileHelper(index, "a+b")
+        self._index = self._file.__enter__()
+        self._index.seek(0, os.SEEK_END)
+        self._record = self._index.tell() // index_dtype.itemsize
+        self._timestamp = timestamp
+        self._entries = []
+
+    def skip(self, size):
+        self._offset += size
+
+    def add(self, record, size):
+        timestamp = record.get(self._timestamp)
+        timestamp = numpy.datetime64("NaT") if timestamp is None else pipecat.store._datetime64(timestamp)
+        self._entries.append((self._record, timestamp, self._offset))
+        self._record += 1
+        self._offset += size
+
+    def flush(self):
+        if self._entries:
+            self._index.write(numpy.array(self._entries, dtype=index_dtype).tobytes())
+            self._entries = []
+        self._index.flush()
+
+    def close(self):
+        self.flush()
+        self._file.__exit__(None, None, None)
+
+
+def _index_path(fobj, index):
+    if index is True:
+        if not isinstance(fobj, six.string_types):
+            raise ValueError("An explicit index is required for file objects.")
+        return fobj + ".index"
+    return index or None
+
+
+def _create_index(fobj, index, timestamp, compression): # pylint: disable=redefined-outer-name
+    with pipecat.store._FileHelper(fobj, "rb", compression=compression) as fobj: # pylint: disable=redefined-argument-from-local
+        _configure_registry()
+        decoder = pipecat.store._RecordDecoder()
+        entries = []
+        while True:
+            offset = fobj.tell()
+            try:
+                record = decoder.decode(pickle.load(fobj))
+            except EOFError:
+                break
+            if record is None:
+                continue
+            value = record.get(timestamp)
+            entries.append((len(entries), numpy.datetime64("NaT") if value is None else pipecat.store._datetime64(value), offset))
+
+    with pipecat.store._FileHelper(index, "wb") as index: # pylint: disable=redefined-argument-from-local
+        index.write(numpy.array(entries, dtype=index_dtype).tobytes())
+
+
+def index(fobj, index=True, timestamp="timestamp", compression="infer"): # pylint: disable=redefined-outer-name
+    """Create an index for an existing pickle file.
+
+    Use this to index files that were written without an index, or to
+    replace an index that is out-of-date.
+
+    Parameters
+    ----------
+    fobj: file-like object or string, required
+        Pickle file, or path of a pickle file, to be indexed.
+    index: file-like object or string, optional
+        File, or path of a file, where the index will be written.  By
+        default, the index is written alongside the pickle file, with an
+        ".index" extension.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compression used by the pickle file.  By default, compression is
+        inferred from the file extension.
+    """
+    _create_index(fobj, _index_path(fobj, index), timestamp, compression)
+
+
+def write( # pylint: disable=redefined-outer-name
+    source,
+    fobj,
+    flush_count=1,
+    flush_bytes=None,
+    flush_interval=None,
+    fsync=False,
+    index=None,
+    timestamp="timestamp",
+    compact=False,
+    compression="infer",
+    ):
+    """Append records to a pickle file.
+
+    By default every record is flushed to the file as soon as it arrives.
+    For higher throughput, records can be buffered in memory and written in
+    groups, flushing the buffer once it contains `flush_count` records or
+    `flush_bytes` bytes, or once `flush_interval` has elapsed since the
+    previous flush, whichever comes first.  Buffered records are always
+    flushed when this generator is closed or the source raises an exception.
+
+    Examples
+    --------
 
-def read(fobj):
-    """Read records from a pickle file."""
-    with pipecat.store._FileHelper(fobj, "rb") as fobj: # pylint: disable=redefined-argument-from-local
-        pint.set_application_registry(pipecat.units)
+    Write UDP messages in groups of up to 1000, flushing at least once per second:
+
+    >>> pipe = pipecat.udp.receive(address, 1024)
+    >>> pipe = pipecat.store.pickle.write(pipe, "messages.pickle", flush_count=1000, flush_interval=pipecat.quantity(1, pipecat.units.second))
+
+    Parameters
+    ----------
+    source: :ref:`Record generator <record-generators>`, required
+    fobj: file-like object or string, required
+        File, or path of a file, where records will be appended.
+    flush_count: int, optional
+        Maximum number of records to buffer before flushing, or `None` for no limit.
+    flush_bytes: int, optional
+        Maximum number of bytes to buffer before flushing.
+    flush_interval: time quantity, optional
+        Maximum time between flushes.  Note that this is only checked when a
+        new record arrives.
+    fsync: bool, optional
+        If `True`, use :func:`os.fsync` after every flush to ensure that
+        records are physically written to storage.
+    index: bool, file-like object or string, optional
+        If `True`, maintain an index alongside the pickle file, with an
+        ".index" extension.  Alternatively, specify the file, or path of a
+        file, where the index will be maintained.  If the pickle file already
+        contains records but the index file doesn't exist, it will be created
+        using :func:`index`.  By default, an existing index alongside the
+        pickle file is maintained.  Use `False` to write without an index.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps to be indexed.
+    compact: bool, optional
+        If `True`, store records in a compact encoding, with quantities
+        stored as magnitudes, and keys and units stored once for every
+        distinct combination of keys and units, instead of once per record.
+        Compact records are decoded automatically by :func:`read`.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compress records using the given algorithm.  By default, compression
+        is inferred from the file extension: ".gz" for gzip, ".bz2" for bz2,
+        and ".xz" or ".lzma" for lzma.  Every flush completes a compressed
+        block, so an interrupted writer loses at most the records that
+        haven't been flushed; use `flush_count` or `flush_bytes` to write
+        larger blocks, which compress better.
+
+    Yields
+    ------
+    record: dict
+        Unmodified input records.
+    """
+    if index is None and isinstance(fobj, six.string_types) and os.path.exists(fobj + ".index"):
+        index = True
+    index = _index_path(fobj, index)
+    if isinstance(fobj, six.string_types) and isinstance(index, six.string_types):
+        if os.path.exists(fobj) and os.path.getsize(fobj) and not os.path.exists(index):
+            _create_index(fobj, index, timestamp, compression)
+
+    with pipecat.store._FileHelper(fobj, "a+b", compression=compression) as fobj: # pylint: disable=redefined-argument-from-local
+        indexer = None if index is None else _Indexer(fobj, index, timestamp)
+        callback = None if indexer is None else indexer.flush
+        writer = pipecat.store._BufferedWriter(fobj, count=flush_count, size=flush_bytes, interval=flush_interval, fsync=fsync, callback=callback)
+        encoder = pipecat.store._RecordEncoder() if compact else None
         try:
-            while True:
-                yield pickle.load(fobj)
-        except EOFError:
-            pass
+            for record in source:
+                if encoder is None:
+                    # Instances of pipecat.record.CompactRecord are stored as dicts, so readers don't depend on the record type.
+                    data = pickle.dumps(dict(record) if isinstance(record, pipecat.record.CompactRecord) else record)
+                else:
+                    definition, item = encoder.encode(record)
+                    if definition is not None:
+                        data = pickle.dumps(definition)
+                        if indexer is not None:
+                            indexer.skip(len(data))
+                        writer.write(data)
+                    data = pickle.dumps(item)
+                if indexer is not None:
+                    indexer.add(record, len(data))
+                writer.write(data)
+                yield record
+        finally:
+            writer.flush()
+            if indexer is not None:
+                indexer.close()
+
+
+_registry_configured = False
+
+
+def _configure_registry():
+    """Configure pint to unpickle quantities using :any:`pipecat.units`, once."""
+    global _registry_configured # pylint: disable=global-statement
+    if not _registry_configured:
+        pint.set_application_registry(pipecat._unit_registry()) # pylint: disable=protected-access
+        _registry_configured = True
+
+
+def _items(fobj):
+    """Load raw items from a file.
+
+    Each item is a separate pickle with its own memo, so a fresh unpickler is
+    needed for every item; a reused unpickler would resolve memo references
+    against the previous items.
+    """
+    load = pickle.load
+    try:
+        while True:
+            yield load(fobj)
+    except EOFError:
+        pass
+
+
+def _find_schema(source):
+    """Return a callback that locates schema definitions, reading `source` from the beginning."""
+    def implementation(decoder, identifier):
+        with pipecat.store._FileHelper(source, "rb") as stream:
+            position = stream.tell()
+            stream.seek(0)
+            try:
+                for item in _items(stream):
+                    if isinstance(item, tuple) and len(item) == 3 and item[0] == identifier:
+                        decoder.decode(item)
+                        break
+            finally:
+                stream.seek(position)
+    return implementation
+
+
+def _load(fobj, count=None, source=None):
+    """Load and decode up to `count` records from a file.
+
+    If `source` is specified, it will be used to locate schema definitions
+    that precede the current file position.
+    """
+    if count is not None and count <= 0:
+        return
+    decoder = pipecat.store._RecordDecoder(missing=None if source is None else _find_schema(source))
+    for item in _items(fobj):
+        record = decoder.decode(item)
+        if record is None:
+            continue
+        yield record
+        if count is not None:
+            count -= 1
+            if count <= 0:
+                break
+
+
+def _load_segment(segment):
+    """Load a contiguous segment of records from a file, for use in a worker process."""
+    path, offset, size, count = segment
+    _configure_registry()
+    with open(path, "rb") as stream:
+        stream.seek(offset)
+        data = stream.read(size)
+    return list(_load(io.BytesIO(data), count, path))
+
+
+def _in_range(record, timestamp, since, until):
+    value = record.get(timestamp)
+    if value is None:
+        return False
+    value = pipecat.store._datetime64(value)
+    if since is not None and value < since:
+        return False
+    if until is not None and value >= until:
+        return False
+    return True
+
+
+def _current(path, entries):
+    """Return True if an index contains every record in an uncompressed pickle file."""
+    size = os.path.getsize(path)
+    if not len(entries):
+        return not size
+    offset = int(entries["offset"][-1])
+    if offset >= size:
+        return False
+    # The last indexed record must end where the file does.
+    with open(path, "rb") as stream:
+        stream.seek(offset)
+        try:
+            pickle.load(stream)
+        except Exception: # pylint: disable=broad-except
+            return False
+        return stream.tell() == size
+
+
+def _read(fobj, start, stop, since, until, index, timestamp, buffer_size, processes, compression): # pylint: disable=redefined-outer-name
+    if (start is not None and start < 0) or (stop is not None and stop < 0):
+        raise ValueError("start and stop must be None or non-negative integers.")
+    since = None if since is None else pipecat.store._datetime64(since)
+    until = None if until is None else pipecat.store._datetime64(until)
+
+    if index is None and isinstance(fobj, six.string_types) and os.path.exists(fobj + ".index"):
+        index = fobj + ".index"
+    entries = None
+    if index not in (None, False) and (processes or start is not None or stop is not None or since is not None or until is not None):
+        with pipecat.store._FileHelper(index, "rb") as stream:
+            entries = numpy.frombuffer(stream.read(), dtype=index_dtype)
+
+    _configure_registry()
+
+    if entries is not None and isinstance(fobj, six.string_types) and pipecat.store._compression(fobj, compression) is None:
+        if not _current(fobj, entries):
+            pipecat.log.warning("Index for %s is out of date, reading the file sequentially.", fobj)
+            entries = None
+
+    if entries is not None:
+        first, last = slice(start, stop).indices(len(entries))[:2]
+        timestamps = entries["timestamp"][first:last]
+        if not numpy.any(pipecat.store._isnat(timestamps)):
+            base = first
+            if since is not None:
+                first = base + numpy.searchsorted(timestamps, since, side="left")
+                since = None
+            if until is not None:
+                last = base + numpy.searchsorted(timestamps, until, side="left")
+                until = None
+        if first >= last:
+            return
+        start, stop = first, last
+
+        if processes and isinstance(fobj, six.string_types) and pipecat.store._compression(fobj, compression) is None:
+            offsets = numpy.append(entries["offset"], os.path.getsize(fobj))
+            step = max(1, -(-(last - first) // (processes * 4)))
+            segments = []
+            for begin in range(first, last, step):
+                end = min(begin + step, len(entries))
+                segments.append((fobj, int(offsets[begin]), int(offsets[end] - offsets[begin]), min(step, last - begin)))
+            pool = multiprocessing.Pool(processes)
+            try:
+                for records in pool.imap(_load_segment, segments):
+                    for record in records:
+                        if (since is None and until is None) or _in_range(record, timestamp, since, until):
+                            yield record
+            finally:
+                pool.terminate()
+            return
+
+    buffering = -1 if buffer_size is None else buffer_size
+    with pipecat.store._FileHelper(fobj, "rb", buffering, compression=compression) as fobj: # pylint: disable=redefined-argument-from-local
+        if entries is not None:
+            fobj.seek(entries["offset"][start])
+            records = _load(fobj, stop - start, fobj)
+        else:
+            records = itertools.islice(_load(fobj), start, stop)
+        for record in records:
+            if (since is None and until is None) or _in_range(record, timestamp, since, until):
+                yield record
+
+
+def read( # pylint: disable=redefined-outer-name
+    fobj,
+    start=None,
+    stop=None,
+    since=None,
+    until=None,
+    index=None,
+    timestamp="timestamp",
+    buffer_size=1048576,
+    batch=None,
+    processes=None,
+    compression="infer",
+    ):
+    """Read records from a pickle file.
+
+    Use `start` and `stop` to read a range of records by position, and
+    `since` and `until` to read a range of records by time.  If an index is
+    available, it is used to seek directly to the first matching record.
+    Otherwise, the file is read from the beginning, discarding records outside
+    the requested ranges.  Finding records by time using the index assumes
+    that every record has a timestamp, and that timestamps are in increasing
+    order.
+
+    For bulk reads, use `batch` to return records in lists instead of one at
+    a time, and `processes` to decode segments of an indexed file in parallel
+    using a pool of worker processes.  Records are always returned in the
+    order they were written.  Since records have to be sent from the workers
+    back to the caller, parallel reads are most effective when records are
+    expensive to decode.
+
+    Examples
+    --------
+
+    Read the records from the last hour of a log that was written with an index:
+
+    >>> now = arrow.utcnow()
+    >>> pipe = pipecat.store.pickle.read("charger.pickle", since=now.shift(hours=-1), until=now)
+
+    Replay an indexed log using four processes, in batches of 10000 records:
+
+    >>> for records in pipecat.store.pickle.read("charger.pickle", batch=10000, processes=4):
+    ...     table.extend(records)
+
+    Parameters
+    ----------
+    fobj: file-like object or string, required
+        File, or path of a file, containing records to be read.
+    start: int, optional
+        Position of the first record to return.
+    stop: int, optional
+        Position of the record following the last record to return.
+    since: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps at or after this time.
+    until: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps before this time.
+    index: file-like object or string, optional
+        File, or path of a file, containing the index.  By default, an index
+        alongside the pickle file will be used if it exists.  Use `False` to
+        ignore any index and read the file sequentially.  An index that
+        doesn't contain every record in an uncompressed file is ignored.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps.
+    buffer_size: int, optional
+        Size in bytes of the read-ahead buffer used when `fobj` is a path.
+    batch: int, optional
+        If specified, return lists containing up to `batch` records at a time.
+    processes: int, optional
+        If specified, decode records using a pool of worker processes.  This
+        requires that `fobj` is the path of an uncompressed file, and that an
+        index is available; otherwise, records are decoded sequentially.
+    compression: "infer", "gzip", "bz2", "lzma", or `None`, optional
+        Compression used by the file.  By default, compression is inferred
+        from the file extension.  Indexes can be used with compressed files,
+        but seeking requires decompressing the file up to the first record.
+
+    Yields
+    ------
+    record: dict, or list of dict if `batch` is specified.
+    """
+    records = _read(fobj, start, stop, since, until, index, timestamp, buffer_size, processes, compression)
+    if batch is None:
+        for record in records:
+            yield record
+    else:
+        while True:
+            records_batch = list(itertools.islice(records, batch))
+            if not records_batch:
+                break
+            yield records_batch
+
+
+def _next_segment(directory, prefix, suffix, path):
+    """Return the segment following `path`, or `None`."""
+    paths = pipecat.store.segments(directory, prefix, suffix)
+    if path in paths and paths.index(path) + 1 < len(paths):
+        return paths[paths.index(path) + 1]
+    return None
+
+
+def follow(fobj, prefix="", suffix="", from_end=False, poll_interval=None, timeout=None):
+    """Read records from a pickle file while it is being written.
+
+    Instead of stopping at the end of the file, this waits for new records
+    to be appended, polling the file for new data.  Records that are only
+    partially written when they are read are kept until the rest of the
+    record arrives.  If the file is replaced (for example, by log rotation),
+    reading starts again at the beginning of the new file.
+
+    If `fobj` is a directory, records are read from the segments created by
+    :func:`pipecat.store.rotate`, moving on to each new segment once it is
+    created.
+
+    Compressed files can't be followed, since a partially written block
+    can't be decompressed.
+
+    Examples
+    --------
+
+    Display charger records as they are logged by another process:
+
+    >>> pipe = pipecat.store.pickle.follow("charger.pickle", from_end=True)
+    >>> for record in pipe:
+    ...     pipecat.record.dump(record)
+
+    Parameters
+    ----------
+    fobj: string, required
+        Path of a pickle file, or a directory containing segments.
+    prefix: string, optional
+        Prefix of the segment file names, if `fobj` is a directory.
+    suffix: string, optional
+        Suffix of the segment file names, if `fobj` is a directory.
+    from_end: bool, optional
+        If `True`, only return records written after this function is
+        called.  Otherwise, existing records are returned first.
+    poll_interval: time quantity, optional
+        Time to wait between checks for new data.  Defaults to ten
+        milliseconds.
+    timeout: time quantity, optional
+        Stop after this much time without new records.  By default, this
+        function never stops.
+
+    Yields
+    ------
+    record: dict
+    """
+    if pipecat.store._compression(fobj, "infer") is not None:
+        raise ValueError("Compressed files can't be followed.")
+    poll_interval = 0.01 if poll_interval is None else poll_interval.to(pipecat.units.seconds).magnitude
+    timeout = None if timeout is None else timeout.to(pipecat.units.seconds).magnitude
+    directory = os.path.isdir(fobj)
+    _configure_registry()
+
+    path = None
+    stream = None
+    following = None
+    data = b""
+    decoder = None
+    last_record = time.time()
+    try:
+        while True:
+            if stream is None:
+                if directory:
+                    paths = pipecat.store.segments(fobj, prefix, suffix)
+                    path = (paths[-1] if from_end else paths[0]) if paths else None
+                else:
+                    path = fobj if os.path.exists(fobj) else None
+                if path is not None:
+                    stream = open(path, "rb")
+                    if from_end:
+                        stream.seek(0, os.SEEK_END)
+                    from_end = False
+                    decoder = pipecat.store._RecordDecoder(missing=_find_schema(path))
+                    data = b""
+
+            chunk = stream.read(1048576) if stream is not None else b""
+            if chunk:
+                data += chunk
+                buffer = io.BytesIO(data)
+                while True:
+                    position = buffer.tell()
+                    try:
+                        item = pickle.load(buffer)
+                    except (EOFError, pickle.UnpicklingError):
+                        # The rest of the record hasn't been written yet.
+                        break
+                    record = decoder.decode(item)
+                    if record is not None:
+                        last_record = time.time()
+                        yield record
+                data = data[position:]
+                continue
+
+            if stream is not None and directory:
+                # Segments are complete before the next segment is created, so
+                # once we've seen the next segment, one more read drains this one.
+                if following is not None:
+                    if data:
+                        pipecat.log.warning("Discarding %s bytes of incomplete data at the end of %s.", len(data), path)
+                    stream.close()
+                    path = following
+                    following = None
+                    stream = open(path, "rb")
+                    decoder = pipecat.store._RecordDecoder(missing=_find_schema(path))
+                    data = b""
+                    continue
+                following = _next_segment(fobj, prefix, suffix, path)
+                if following is not None:
+                    continue
+            elif stream is not None:
+                try:
+                    status = os.stat(path)
+                    replaced = status.st_ino != os.fstat(stream.fileno()).st_ino or status.st_size < stream.tell()
+                except OSError:
+                    replaced = True
+                if replaced:
+                    stream.close()
+                    stream = None
+                    continue
+
+            if timeout is not None and time.time() - last_record >= timeout:
+                return
+            time.sleep(poll_interval)
+    finally:
+        if stream is not None:
+            stream.close()
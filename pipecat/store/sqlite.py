@@ -0,0 +1,310 @@
+# Copyright 2016 Timothy M. Shead
+#
+# This file is part of Pipecat.
+#
+# Pipecat is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Pipecat is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pipecat.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Functions for reading and writing data using SQLite databases.
+
+Records are stored in a database table with one row per record, and one
+column per key, named by joining :ref:`hierarchical keys <record-keys>` with
+"/".  Columns are created automatically as new keys are encountered, and
+missing values are stored as NULL.  Quantities are stored as magnitudes, and
+timestamps are stored as integer microseconds since the Unix epoch, in UTC.
+The original keys, types, and units of each column are stored in a separate
+"pipecat_columns" table, so records can be rebuilt when they are read.
+
+Because the data is an ordinary SQLite database, it can also be queried
+directly, for example using the `sqlite3` command line tool.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import collections
+import datetime
+import itertools
+import json
+import sqlite3
+import time
+
+import arrow
+import numpy
+import six
+
+import pipecat.store
+
+_epoch = datetime.datetime(1970, 1, 1)
+
+
+def _quote(identifier):
+    return '"%s"' % identifier.replace('"', '""')
+
+
+def _connect(fobj):
+    """Return a connection, and whether it should be closed when we're done."""
+    if isinstance(fobj, sqlite3.Connection):
+        return fobj, False
+    connection = sqlite3.connect(fobj)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection, True
+
+
+def _columns(connection, table):
+    """Return the columns of a table, indexed by key."""
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS pipecat_columns "
+        "(table_name TEXT, name TEXT, key TEXT, type TEXT, units TEXT, PRIMARY KEY (table_name, name))"
+        )
+    columns = collections.OrderedDict()
+    for name, key, kind, units in connection.execute("SELECT name, key, type, units FROM pipecat_columns WHERE table_name=? ORDER BY rowid", (table,)):
+        key = json.loads(key)
+        key = tuple(key) if isinstance(key, list) else key
+        columns[key] = (name, kind, None if units is None else pipecat.units.parse_units(units))
+    return columns
+
+
+def _kind(value):
+    """Return the type used to store a value."""
+    if isinstance(value, pipecat.quantity):
+        value = value.magnitude
+    if isinstance(value, (arrow.Arrow, datetime.datetime, numpy.datetime64)):
+        return "timestamp"
+    if isinstance(value, (bool, numpy.bool_)):
+        return "boolean"
+    if isinstance(value, six.integer_types + (numpy.integer,)):
+        return "integer"
+    if isinstance(value, (float, numpy.floating)):
+        return "float"
+    return "text"
+
+
+_affinity = {"timestamp": "INTEGER", "boolean": "INTEGER", "integer": "INTEGER", "float": "REAL", "text": "TEXT"}
+
+
+def _stored(value, kind, units):
+    """Convert a value to the form stored in a column."""
+    if value is None:
+        return None
+    if units is not None and isinstance(value, pipecat.quantity):
+        value = pipecat.store._magnitude(value, units)
+    if kind == "timestamp":
+        value = pipecat.store._datetime64(value)
+        return int(value.astype(numpy.int64)) if not pipecat.store._isnat(value) else None
+    if kind == "boolean":
+        return int(value)
+    if kind == "integer" and isinstance(value, numpy.integer):
+        return int(value)
+    if kind == "float" and isinstance(value, numpy.floating):
+        return float(value)
+    if kind == "text" and not isinstance(value, six.string_types):
+        return six.text_type(value)
+    return value
+
+
+def _value(value, kind, units):
+    """Convert a stored value back to the form it was written."""
+    if kind == "timestamp":
+        return arrow.get(_epoch + datetime.timedelta(microseconds=value))
+    if kind == "boolean":
+        value = bool(value)
+    if units is not None:
+        return pipecat.quantity(value, units)
+    return value
+
+
+class _Writer(object):
+    """Inserts records into a database table in batches."""
+    def __init__(self, connection, table, timestamp):
+        self._connection = connection
+        self._table = table
+        self._timestamp = timestamp
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS %s (rowid INTEGER PRIMARY KEY)" % _quote(table))
+            self._columns = _columns(connection, table)
+        self._statements = {}
+        self._pending = []
+        self.count = 0
+
+    def add(self, record):
+        keys = tuple(record.keys())
+        statement = self._statements.get(keys)
+        if statement is None:
+            statement = self._statements[keys] = self._statement(record)
+        columns = [self._columns[key] for key in keys]
+        self._pending.append((keys, tuple(_stored(record[key], kind, units) for key, (name, kind, units) in zip(keys, columns))))
+        self.count += 1
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self._connection:
+            # Consecutive records with the same keys are inserted together, preserving record order.
+            for keys, rows in itertools.groupby(self._pending, lambda pending: pending[0]):
+                self._connection.executemany(self._statements[keys], [row for _, row in rows])
+        self._pending = []
+        self.count = 0
+
+    def _statement(self, record):
+        """Create any missing columns, and return an insert statement for a set of keys."""
+        created = []
+        for key, value in record.items():
+            if key in self._columns:
+                continue
+            name = pipecat.store._column_name(key, "/")
+            kind = _kind(value)
+            units = value.units if isinstance(value, pipecat.quantity) else None
+            created.append((name, json.dumps(key), kind, None if units is None else str(units), key))
+            self._columns[key] = (name, kind, units)
+        if created:
+            self.flush()
+            with self._connection:
+                for name, key, kind, units, original in created:
+                    self._connection.execute("ALTER TABLE %s ADD COLUMN %s %s" % (_quote(self._table), _quote(name), _affinity[kind]))
+                    self._connection.execute("INSERT INTO pipecat_columns VALUES (?, ?, ?, ?, ?)", (self._table, name, key, kind, units))
+                    if original == self._timestamp:
+                        index = _quote("%s_%s" % (self._table, name))
+                        self._connection.execute("CREATE INDEX IF NOT EXISTS %s ON %s (%s)" % (index, _quote(self._table), _quote(name)))
+        names = [_quote(self._columns[key][0]) for key in record.keys()]
+        return "INSERT INTO %s (%s) VALUES (%s)" % (_quote(self._table), ", ".join(names), ", ".join(["?"] * len(names)))
+
+
+def write(source, fobj, table="records", timestamp="timestamp", batch_size=1000, flush_interval=None):
+    """Append records to a SQLite database.
+
+    Records are inserted in batches, with each batch inserted in a single
+    transaction.  Databases opened by this function use write-ahead logging,
+    so readers can query the database while records are being written.  The
+    `timestamp` column is indexed, so time range queries are fast.
+
+    Examples
+    --------
+
+    Log charger records, then query them using SQL:
+
+    >>> pipe = pipecat.store.sqlite.write(pipe, "charger.db")
+    ...
+    $ sqlite3 charger.db 'SELECT max("battery/voltage") FROM records'
+
+    Parameters
+    ----------
+    source: :ref:`Record generator <record-generators>`, required
+    fobj: :class:`sqlite3.Connection` or string, required
+        Database connection, or path of a database, where records will be appended.
+    table: string, optional
+        Name of the database table where records will be stored.  The table
+        is created if it doesn't exist.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps, which will be indexed.
+    batch_size: int, optional
+        Maximum number of records to insert in each transaction.
+    flush_interval: time quantity, optional
+        Maximum time between transactions.  Note that this is only checked
+        when a new record arrives.
+
+    Yields
+    ------
+    record: dict
+        Unmodified input records.
+    """
+    interval = None if flush_interval is None else flush_interval.to(pipecat.units.seconds).magnitude
+    connection, close = _connect(fobj)
+    try:
+        writer = _Writer(connection, table, timestamp)
+        last_flush = time.time()
+        try:
+            for record in source:
+                writer.add(record)
+                if writer.count >= batch_size or (interval is not None and time.time() - last_flush >= interval):
+                    writer.flush()
+                    last_flush = time.time()
+                yield record
+        finally:
+            writer.flush()
+    finally:
+        if close:
+            connection.close()
+
+
+def read(fobj, table="records", keys=None, since=None, until=None, where=None, timestamp="timestamp", batch_size=1000):
+    """Read records from a SQLite database.
+
+    Time ranges and key filters are evaluated by the database, so only the
+    matching records are returned to Python.  Records are returned in the
+    order they were written.
+
+    Examples
+    --------
+
+    Read the battery voltage while charging during the last hour:
+
+    >>> now = arrow.utcnow()
+    >>> keys = ["timestamp", ("battery", "voltage")]
+    >>> pipe = pipecat.store.sqlite.read("charger.db", keys=keys, since=now.shift(hours=-1), where={("charger", "mode"): "charge"})
+
+    Parameters
+    ----------
+    fobj: :class:`sqlite3.Connection` or string, required
+        Database connection, or path of a database, containing records to be read.
+    table: string, optional
+        Name of the database table containing records.
+    keys: sequence of :ref:`Record keys <record-keys>`, optional
+        Keys to include in the records.  By default, every key is included.
+    since: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps at or after this time.
+    until: :class:`arrow.arrow.Arrow`, :class:`datetime.datetime`, or `datetime64`, optional
+        Only return records with timestamps before this time.
+    where: dict, optional
+        Maps keys to values.  Only records containing every key, with the
+        corresponding value, will be returned.
+    timestamp: :ref:`Record key <record-keys>`, optional
+        Key containing record timestamps.
+    batch_size: int, optional
+        Number of rows to retrieve from the database at a time.
+
+    Yields
+    ------
+    record: dict
+    """
+    connection, close = _connect(fobj)
+    try:
+        columns = _columns(connection, table)
+        selected = [(key, columns[key]) for key in (keys if keys is not None else columns) if key in columns]
+
+        conditions = []
+        parameters = []
+        for key, value, operator in [(timestamp, since, ">="), (timestamp, until, "<")] + [(key, value, "=") for key, value in (where or {}).items()]:
+            if value is None:
+                continue
+            if key not in columns:
+                return
+            name, kind, units = columns[key]
+            conditions.append("%s %s ?" % (_quote(name), operator))
+            parameters.append(_stored(value, kind, units))
+
+        query = "SELECT %s FROM %s" % (", ".join(_quote(name) for key, (name, kind, units) in selected) or "rowid", _quote(table))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY rowid"
+
+        cursor = connection.execute(query, parameters)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict((key, _value(value, kind, units)) for (key, (name, kind, units)), value in zip(selected, row) if value is not None)
+    finally:
+        if close:
+            connection.close()
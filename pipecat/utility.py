@@ -19,7 +19,6 @@
 
 from __future__ import absolute_import, division, print_function
 
-import arrow
 import six
 
 import pipecat.record
@@ -57,11 +56,144 @@ def add_timestamp(source, key="timestamp"):
     record: dict
         Input records containing an additional field `key` with a :class:`arrow.arrow.Arrow` UTC timestamp value.
     """
+    import arrow
+
     for record in source:
         pipecat.record.add_field(record, key, arrow.utcnow())
         yield record
 
 
+def _compact_layout(units, targets):
+    """Return the converted units for a compact record layout.
+
+    `units` maps the keys of the layout to their units.  Returns a dict
+    mapping the converted keys to their new units, the (key, scale, offset)
+    conversion for each of them, and the targets that still have to be
+    converted by value, because their keys aren't stored as magnitudes or
+    their conversions aren't affine.
+    """
+    converted = {}
+    affine = []
+    remaining = []
+    for key, target, cache in targets:
+        unit = units.get(key)
+        conversion = None if unit is None else _unit_conversion(unit, target, cache)
+        if conversion is None:
+            remaining.append((key, target, cache))
+        else:
+            converted[key] = target
+            affine.append((key, conversion[0], conversion[1]))
+    return converted, affine, remaining
+
+
+def _unit_conversion(unit, target, cache):
+    """Return the cached (scale, offset) conversion between two units, or `None` if it isn't affine."""
+    if unit not in cache:
+        cache[unit] = pipecat._conversion(pipecat.units.Unit(unit), target) # pylint: disable=protected-access
+    return cache[unit]
+
+
+def _convert_lazy(record, targets, layouts):
+    """Return a copy of a lazy record with magnitudes converted, sharing a units dict with similar records."""
+    units = record._units # pylint: disable=protected-access
+    layout = layouts.get(id(units))
+    if layout is None or layout[0] is not units:
+        converted, affine, remaining = _compact_layout(units, targets)
+        merged = dict(units)
+        merged.update(converted)
+        # Records that were modified have their own units dicts, so don't let the cache grow without bound.
+        if len(layouts) > 256:
+            layouts.clear()
+        layout = layouts[id(units)] = (units, merged, affine, remaining)
+    magnitudes = dict(record._magnitudes) # pylint: disable=protected-access
+    for key, scale, offset in layout[2]:
+        value = magnitudes.get(key)
+        if value is not None:
+            magnitudes[key] = value * scale + offset
+    return pipecat.record.LazyRecord(layout[1], magnitudes), layout[3]
+
+
+def _convert_schema(record, targets, layouts):
+    """Return a copy of a schema record with magnitudes converted, using a schema in the target units."""
+    layout = layouts.get(type(record))
+    if layout is None:
+        fields = type(record).fields
+        converted, affine, remaining = _compact_layout(dict(zip(fields, record.units)), targets)
+        derived = pipecat.record.schema(type(record).__name__, [(key, converted.get(key, units)) for key, units in zip(fields, record.units)])
+        positions = dict((key, position) for position, key in enumerate(fields))
+        layout = layouts[type(record)] = (derived, [(positions[key], scale, offset) for key, scale, offset in affine], remaining)
+    values = list(record._values) # pylint: disable=protected-access
+    for position, scale, offset in layout[1]:
+        value = values[position]
+        if value is not None and value is not pipecat.record._missing: # pylint: disable=protected-access
+            values[position] = value * scale + offset
+    result = layout[0](values)
+    if record._extra is not None: # pylint: disable=protected-access
+        result._extra = dict(record._extra) # pylint: disable=protected-access
+    return result, layout[2]
+
+
+def convert_units(source, units):
+    """Convert quantities in every record returned from a source to other units.
+
+    The conversion between each pair of units is computed once and cached,
+    then applied to the magnitude of each value using floating point
+    arithmetic, which is much faster than calling
+    :meth:`pint.Quantity.to` for every record.  Fields that are missing or
+    don't contain quantities are left unmodified.  Use
+    :meth:`pipecat.store.Table.convert` to convert columns that have already
+    been stored.
+
+    Dict records are modified in place.  Compact records, such as
+    :class:`pipecat.record.LazyRecord` and records created with
+    :func:`pipecat.record.schema`, are replaced by records of the same kind
+    that store the converted magnitudes, so they keep their compact layout.
+
+    Examples
+    --------
+
+    Report charger voltages in millivolts and temperatures in Fahrenheit:
+
+    >>> units = {("battery", "voltage"): pipecat.units.millivolts, ("charger", "temperature", "internal"): pipecat.units.degF}
+    >>> pipe = pipecat.utility.convert_units(pipe, units)
+
+    Parameters
+    ----------
+    source: :ref:`Record generator <record-generators>`, required
+    units: dict, required
+        Maps :ref:`Record keys <record-keys>` to the units their values will
+        be converted to.  Units may be specified as strings.
+
+    Yields
+    ------
+    record: dict or :class:`pipecat.record.CompactRecord`
+        Input records with quantities converted.
+    """
+    targets = []
+    for key, target in units.items():
+        if isinstance(target, six.string_types):
+            target = pipecat.units.parse_units(target)
+        targets.append((key, target, {}))
+
+    layouts = {}
+    for record in source:
+        remaining = targets
+        if isinstance(record, pipecat.record.LazyRecord):
+            record, remaining = _convert_lazy(record, targets, layouts)
+        elif isinstance(record, pipecat.record.SchemaRecord):
+            record, remaining = _convert_schema(record, targets, layouts)
+        for key, target, cache in remaining:
+            value = record.get(key)
+            if not isinstance(value, pipecat.quantity) or value.units == target:
+                continue
+            conversion = _unit_conversion(value._units, target, cache) # pylint: disable=protected-access
+            if conversion is None:
+                record[key] = value.to(target)
+            else:
+                record[key] = pipecat.quantity(value.magnitude * conversion[0] + conversion[1], target)
+        yield record
+
+
 def extract_quantities(source, value="value", units="units"):
     """Convert values with separate magnitude / units data into :class:`pipecat.quantity` instances.
 
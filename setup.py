@@ -49,6 +49,7 @@ setup(
     packages=find_packages(),
     scripts=[
         "bin/pipecat-charger-status",
+        "bin/pipecat-convert",
         "bin/pipecat-wind-status",
     ],
     url="http://pipecat.readthedocs.org",